@@ -0,0 +1,61 @@
+# Бенчмарк correlation_matrix против исходной попарной реализации
+# Запуск из корня репозитория:
+#   python -m benchmarks.correlation_matrix [число_столбцов] [длина_столбца] [процессов]
+import random
+import sys
+import time
+from typing import List
+
+from chapters import linear_algebra
+from chapters.linear_algebra import Matrix, Vector, make_matrix
+from chapters.statistics import correlation
+from chapters.work_with_data import correlation_matrix
+
+
+def naive_correlation_matrix(data: List[Vector]) -> Matrix:
+    """Исходная реализация: correlation для всех n^2 пар"""
+    def correlation_ij(i: int, j: int) -> float:
+        return correlation(data[i], data[j])
+
+    return make_matrix(len(data), len(data), correlation_ij)
+
+
+def max_abs_difference(A: Matrix, B: Matrix) -> float:
+    return max(abs(a - b) for row_a, row_b in zip(A, B) for a, b in zip(row_a, row_b))
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    num_columns = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    column_length = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    processes = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+
+    random.seed(0)
+    data = [[random.gauss(0, 1) for _ in range(column_length)]
+            for _ in range(num_columns)]
+    data.append([1.0] * column_length)  # столбец без вариации
+
+    expected, naive_time = timed(naive_correlation_matrix, data)
+    print(f"попарно:             {naive_time:8.3f} с")
+
+    actual, fast_time = timed(correlation_matrix, data)
+    assert max_abs_difference(expected, actual) < 1e-9
+    print(f"один проход:         {fast_time:8.3f} с")
+
+    actual, pool_time = timed(correlation_matrix, data, processes=processes)
+    assert max_abs_difference(expected, actual) < 1e-9
+    print(f"пул из {processes} процессов:  {pool_time:8.3f} с")
+
+    try:
+        linear_algebra.set_backend('numpy')
+    except ImportError:
+        sys.exit()
+    actual, numpy_time = timed(correlation_matrix, data)
+    linear_algebra.set_backend('python')
+    assert max_abs_difference(expected, actual) < 1e-9
+    print(f"numpy:               {numpy_time:8.3f} с")
@@ -0,0 +1,44 @@
+# Бенчмарк времени импорта модулей chapters
+# Каждый модуль импортируется в отдельном "холодном" интерпретаторе,
+# чтобы кэш sys.modules не искажал результат.
+# Запуск из корня репозитория: python -m benchmarks.import_time [бюджет_в_секундах]
+import os
+import subprocess
+import sys
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHAPTERS = ['linear_algebra', 'statistics', 'probability',
+            'hypothesis_and_conclusion', 'gradient_descent',
+            'work_with_data', 'time_series', 'getting_data']
+
+IMPORT_BUDGET = 0.5  # секунд на один модуль, включая зависимости
+
+_SNIPPET = ("import time; start = time.perf_counter(); "
+            "import chapters.{name}; "
+            "print(time.perf_counter() - start)")
+
+
+def import_time(name: str) -> float:
+    """Возвращает время (в секундах) импорта chapters.<name>
+       в новом процессе Python"""
+    out = subprocess.run([sys.executable, '-c', _SNIPPET.format(name=name)],
+                         cwd=ROOT, check=True,
+                         stdout=subprocess.PIPE, universal_newlines=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def import_times(names: List[str] = CHAPTERS) -> Dict[str, float]:
+    return {name: import_time(name) for name in names}
+
+
+if __name__ == '__main__':
+    budget = float(sys.argv[1]) if len(sys.argv) > 1 else IMPORT_BUDGET
+
+    times = import_times()
+    for name, seconds in times.items():
+        print(f"chapters.{name:<28} {seconds * 1000:8.1f} мс")
+
+    slow = {name: seconds for name, seconds in times.items() if seconds > budget}
+    assert not slow, f"превышен бюджет импорта {budget} с: {slow}"
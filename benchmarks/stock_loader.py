@@ -0,0 +1,60 @@
+# Бенчмарк load_stock_prices против построчного csv.reader + try_parse_row
+# Запуск из корня репозитория:
+#   python -m benchmarks.stock_loader [число_строк]     (например, 10000000)
+import csv
+import datetime
+import os
+import random
+import sys
+import tempfile
+import time
+
+from chapters.work_with_data import try_parse_row, load_stock_prices
+
+SYMBOLS = ['AAPL', 'MSFT', 'GOOG', 'FB', 'AMZN', 'NFLX', 'TSLA', 'IBM']
+BAD_ROWS = [['MSFT0', '2018-12-14', '106.03'],
+            ['MSFT', '2018-12--14', '106.03'],
+            ['MSFT', '2018-12-14', 'x']]
+
+
+def write_prices(path: str, num_rows: int, seed: int = 0) -> None:
+    """Пишет num_rows строк symbol,date,closing_price (примерно 0.1% плохих)"""
+    rng = random.Random(seed)
+    start = datetime.date(2000, 1, 1).toordinal()
+    dates = [datetime.date.fromordinal(start + i).isoformat() for i in range(7300)]
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        for _ in range(num_rows):
+            if rng.random() < 0.001:
+                writer.writerow(rng.choice(BAD_ROWS))
+            else:
+                writer.writerow([rng.choice(SYMBOLS), rng.choice(dates),
+                                 f"{rng.uniform(1, 1000):.2f}"])
+
+
+def load_row_by_row(path: str):
+    with open(path, newline='') as f:
+        parsed = [try_parse_row(row) for row in csv.reader(f)]
+    return [price for price in parsed if price is not None], parsed.count(None)
+
+
+if __name__ == '__main__':
+    num_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+    path = os.path.join(tempfile.mkdtemp(), 'prices.csv')
+    write_prices(path, num_rows)
+
+    start = time.perf_counter()
+    expected, expected_bad = load_row_by_row(path)
+    row_time = time.perf_counter() - start
+    print(f"try_parse_row:     {row_time:8.2f} с")
+
+    start = time.perf_counter()
+    columns, bad = load_stock_prices(path)
+    bulk_time = time.perf_counter() - start
+    print(f"load_stock_prices: {bulk_time:8.2f} с  (в {row_time / bulk_time:.1f} раза быстрее)")
+
+    assert bad == expected_bad
+    assert list(columns) == expected
+
+    os.remove(path)
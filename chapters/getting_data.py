@@ -137,115 +137,597 @@ with open('file.txt', 'wb') as f:
 '''
 import re
 
-from bs4 import BeautifulSoup
-import requests
-
-
-url = "https://raw.githubusercontent.com/joelgrus/data/master/getting-data.html"
-html = requests.get(url).text
-soup = BeautifulSoup(html, 'html5lib')
-
-first_paragraph = soup.find('p')  # первый тег <p>, можно просто soup.p
-first_paragraph_text = soup.p.text  # Текст первого элемента <p>
-first_paragraph_words = soup.p.text.split()  # Слова первого элемента
-
-first_paragraph_id = soup.p['id']  # дает ошибку, если id не существует
-first_paragraph_id2 = soup.p.get('id')  # Возвращает None, если id нет
-
-all_paragraphs = soup.find_all('p')  # или просто soup('p')
-paragraphs_with_ids = [p for p in soup('p') if p.get('id')]
-
-important_paragraphs = soup('p', {'class': 'important'})
-important_paragraphs2 = soup('p', 'important')
-important_paragraphs3 = [p for p in soup('p') if 'important' in p.get('class', [])]
-
-# Элементы <span> внутри элементов <div>
-# Предупреждение: вернет тот же span несколько раз,
-# если он находится внутри нескольких элементов div.
-# Нужно быть смышленее в этом случае
-spans_inside_divs = [span
-                     for div in soup('div')  # для каждого <div> на странице
-                     for span in div('span')]  # отыскать каждый <span> внутри него
 
 # Пример: Слежение за Конгрессом
-url = 'https://www.house.gov/representatives'
-text = requests.get(url).text
-soup = BeautifulSoup(text, 'html5lib')
-
-all_urls = [a['href']
-            for a in soup('a')
-            if a.has_attr('href')]
-
-print(len(all_urls))  # Слишком много - 967
-
 # нам нужны те, которые начинаются с http:// либо https://
 # должно оканчиваться на .house.gov либо .house.gov/
 regex = r"^https?://.*\.house\.gov/?$"
 
-# напишем несколько тестов
-assert re.match(regex, "http://joel.house.gov")
-assert re.match(regex, "https://joel.house.gov")
-assert re.match(regex, "http://joel.house.gov/")
-assert re.match(regex, "https://joel.house.gov/")
-assert not re.match(regex, "joel.house.gov")
-assert not re.match(regex, "http://joel.house.com")
-assert not re.match(regex, "https://joel.house.gov/biography")
-
-# И теперь применим
-good_urls = [url for url in all_urls if re.match(regex, url)]
-
-print(len(good_urls))  # всё еще много - 880
-
-# устраним дубликаты
-good_urls = list(set(good_urls))
-
-print(len(good_urls))  # теперь 440
-
-html = requests.get('https://jayapal.house.gov').text
-soup = BeautifulSoup(html, 'html5lib')
-
-# Мы используем множество, т. к. ссылки могут появляться многократно
-links = {a['href'] for a in soup('a') if 'press releases' in a.text.lower()}
-
-print(links)
-
 
+# Обход страниц конгрессменов.
+# Crawler скачивает страницы параллельно (не больше max_workers запросов
+# одновременно) через одну сессию requests с пулом соединений, выдерживает
+# интервал между запросами к одному хосту (per_host_rate запросов в секунду)
+# и хранит ответы в каталоге cache_dir: повторный запрос отправляется
+# с If-None-Match / If-Modified-Since, и при ответе 304 тело берется из кэша
+import codecs
+import hashlib
 import json
-
-
-serialized = """{ "title" : "Data Science Book",
-                  "author" : "Joel Grus",
-                  "publicationYear" : 2019,
-                  "topics" : [ "data", "science", "data science"] }"""
-
-# Разобрать JSON, создав Питоновский словарь
-deserialized = json.loads(serialized)
-
-assert deserialized["publicationYear"] == 2019
-assert "data science" in deserialized["topics"]
-
-
-import requests, json
-
-
-github_user = "joelgrus"
-endpoint = f"https://api.github.com/users/{github_user}/repos"
-
-repos = json.loads(requests.get(endpoint).text)
-
-
-from  collections import Counter
-from dateutil.parser import parse
-
-dates = [parse(repo["created_at"]) for repo in repos]  # Список дат
-month_counts = Counter(date.month for date in dates)  # число месяцев
-weekday_counts = Counter(date.weekday() for date in dates)  # число будних дней
-
-last_5_repos = sorted(repos,  # последние 5 хранилищ
-                      key=lambda r: r["created_at"],
-                      reverse=True)[:5]
-
-last_5_languages = [repo["language"]  # Последние 5 языков
-                    for repo in last_5_repos]
-
-
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Set, Tuple
+from urllib.parse import urljoin, urlsplit
+
+
+class ResponseCache:
+    """Ответы на диске: <sha256(url)>.body и <sha256(url)>.json
+       (ETag, Last-Modified и другие заголовки из CACHED_HEADERS)"""
+    CACHED_HEADERS = ('ETag', 'Last-Modified', 'Link', 'Content-Type')
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, url: str, suffix: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(url.encode()).hexdigest() + suffix)
+
+    def headers(self, url: str) -> Dict[str, str]:
+        """Сохраненные заголовки ответа (пусто, если ответа нет в кэше)"""
+        try:
+            with open(self._path(url, '.json')) as f:
+                return json.load(f)['headers']
+        except FileNotFoundError:
+            return {}
+
+    def validators(self, url: str) -> Dict[str, str]:
+        """Заголовки условного запроса для url"""
+        headers = self.headers(url)
+        validators = {}
+        if 'ETag' in headers:
+            validators['If-None-Match'] = headers['ETag']
+        if 'Last-Modified' in headers:
+            validators['If-Modified-Since'] = headers['Last-Modified']
+        return validators
+
+    def body(self, url: str) -> bytes:
+        with open(self._path(url, '.body'), 'rb') as f:
+            return f.read()
+
+    def chunks(self, url: str, chunk_size: int) -> Iterator[bytes]:
+        with open(self._path(url, '.body'), 'rb') as f:
+            yield from iter(lambda: f.read(chunk_size), b'')
+
+    def put(self, url: str, body: bytes, headers: Mapping[str, str]) -> None:
+        for _ in self.put_chunks(url, [body], headers):
+            pass
+
+    def put_chunks(self, url: str, chunks: Iterable[bytes],
+                   headers: Mapping[str, str]) -> Iterator[bytes]:
+        """Пропускает через себя блоки тела ответа, записывая их в кэш.
+           Ответ попадает в кэш, только если тело прочитано до конца"""
+        kept = {name: headers[name] for name in self.CACHED_HEADERS if name in headers}
+        if 'ETag' not in kept and 'Last-Modified' not in kept:
+            yield from chunks  # без валидаторов ответ нельзя перепроверить
+            return
+        body_path = self._path(url, '.body')
+        partial_path = f"{body_path}.{threading.get_ident()}.part"
+        with open(partial_path, 'wb') as f:
+            for chunk in chunks:
+                f.write(chunk)
+                yield chunk
+        # тело пишется раньше метаданных: валидаторы без тела не появятся
+        os.replace(partial_path, body_path)
+        with open(self._path(url, '.json'), 'w') as f:
+            json.dump({'url': url, 'headers': kept}, f)
+
+
+def _encoding(headers: Mapping[str, str], body: bytes) -> str:
+    """Кодировка из charset заголовка Content-Type; без него - UTF-8, если
+       тело ее допускает, иначе Latin-1. Одинакова для свежего ответа
+       и для тела из кэша (Content-Type хранится вместе с ним)"""
+    match = re.search(r'charset="?([\w.:-]+)', headers.get('Content-Type', ''), re.IGNORECASE)
+    if match:
+        try:
+            return codecs.lookup(match.group(1)).name
+        except LookupError:
+            pass
+    try:
+        body.decode('utf-8')
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return 'iso-8859-1'
+
+
+class RateLimiter:
+    """Не больше rate запросов в секунду к каждому хосту"""
+
+    def __init__(self, rate: Optional[float]) -> None:
+        self.interval = 1 / rate if rate else 0
+        self._next_slot: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def wait(self, host: str) -> None:
+        if not self.interval:
+            return
+        with self._lock:  # занять ближайшее свободное время для хоста
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+        time.sleep(slot - now)
+
+
+class Crawler:
+    def __init__(self,
+                 max_workers: int = 8,
+                 per_host_rate: Optional[float] = None,
+                 cache_dir: Optional[str] = None,
+                 timeout: float = 10) -> None:
+        import requests  # тяжелый импорт - только при создании обходчика
+        from requests.adapters import HTTPAdapter
+
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.rate_limiter = RateLimiter(per_host_rate)
+        self.cache = ResponseCache(cache_dir) if cache_dir is not None else None
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.stats: Counter = Counter()  # число ответов 200, 304 и ошибок
+        self._stats_lock = threading.Lock()  # fetch вызывается из потоков пула
+
+    def _count(self, outcome: str) -> None:
+        with self._stats_lock:
+            self.stats[outcome] += 1
+
+    def _get(self, url: str, stream: bool = False):
+        """Ответ requests и признак того, что тело нужно брать из кэша (304)"""
+        headers = self.cache.validators(url) if self.cache is not None else {}
+        self.rate_limiter.wait(urlsplit(url).netloc)
+        response = self.session.get(url, headers=headers, timeout=self.timeout, stream=stream)
+        if response.status_code == 304 and headers:
+            self._count('not_modified')
+            return response, True
+        response.raise_for_status()
+        self._count('fetched')
+        return response, False
+
+    def fetch(self, url: str) -> str:
+        """Текст страницы; ошибки HTTP и сети выбрасываются как исключения requests"""
+        response, cached = self._get(url)
+        if cached:
+            headers, body = self.cache.headers(url), self.cache.body(url)
+        else:
+            headers, body = response.headers, response.content
+            if self.cache is not None:
+                self.cache.put(url, body, headers)
+        return body.decode(_encoding(headers, body), errors='replace')
+
+    def stream(self, url: str, chunk_size: int = 1 << 16) -> Tuple[Mapping[str, str], Iterator[bytes]]:
+        """Заголовки ответа и итератор по блокам тела: тело не держится
+           в памяти целиком (и по мере чтения записывается в кэш)"""
+        response, cached = self._get(url, stream=True)
+        if cached:
+            response.close()
+            return self.cache.headers(url), self.cache.chunks(url, chunk_size)
+        chunks = response.iter_content(chunk_size)
+        if self.cache is not None:
+            chunks = self.cache.put_chunks(url, chunks, response.headers)
+        return response.headers, chunks
+
+    def fetch_all(self, urls: Iterable[str]) -> Dict[str, Optional[str]]:
+        """{url: текст} для всех url без повторов (в порядке первого появления);
+           для страниц, которые не удалось скачать, - None"""
+        urls = list(dict.fromkeys(urls))
+        with ThreadPoolExecutor(self.max_workers) as pool:
+            futures = [pool.submit(self.fetch, url) for url in urls]
+        pages = {}
+        for url, future in zip(urls, futures):
+            try:
+                pages[url] = future.result()
+            except Exception:
+                self._count('failed')
+                pages[url] = None
+        return pages
+
+    def close(self) -> None:
+        self.session.close()
+
+    def __enter__(self) -> 'Crawler':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def links(html: str, base_url: str = '',
+          text_filter: Optional[Callable[[str], bool]] = None) -> List[str]:
+    """Адреса ссылок <a href> страницы без повторов, в порядке появления;
+       text_filter отбирает ссылки по тексту"""
+    from bs4 import BeautifulSoup  # тяжелый импорт - только при разборе
+
+    soup = BeautifulSoup(html, 'html5lib')
+    found = (urljoin(base_url, a['href'])
+             for a in soup('a')
+             if a.has_attr('href') and (text_filter is None or text_filter(a.text)))
+    return list(dict.fromkeys(found))
+
+
+def representative_urls(html: str, pattern: str = regex) -> List[str]:
+    """Адреса сайтов конгрессменов со страницы-списка (без повторов)"""
+    return [url for url in links(html) if re.match(pattern, url)]
+
+
+def press_release_links(crawler: Crawler,
+                        index_url: str = 'https://www.house.gov/representatives',
+                        pattern: str = regex) -> Dict[str, Set[str]]:
+    """{сайт конгрессмена: ссылки на пресс-релизы}; сайты скачиваются параллельно"""
+    good_urls = representative_urls(crawler.fetch(index_url), pattern)
+    pages = crawler.fetch_all(good_urls)
+    return {url: set(links(html, url, lambda text: 'press releases' in text.lower()))
+            for url, html in pages.items() if html is not None}
+
+
+# Хранилища пользователя GitHub.
+# GitHubClient запрашивает первую страницу списка, по заголовку Link узнает
+# номер последней и скачивает остальные страницы параллельно (через Crawler,
+# то есть с кэшем и условными запросами). Ответ разбирается по мере
+# получения блоков, и от каждого хранилища остаются только нужные поля
+import datetime
+import heapq
+import itertools
+from typing import NamedTuple
+from urllib.parse import parse_qsl, urlencode
+
+_JSON_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+def iter_json_array(chunks: Iterable[bytes]) -> Iterator:
+    """Элементы массива JSON, получаемого блоками байт (UTF-8),
+       по одному: весь текст ответа в памяти не собирается"""
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder('utf-8')()
+    buffer, pos, started, closed = '', 0, False, False
+    after_item, after_comma = False, False  # что было последним внутри массива
+    for chunk in itertools.chain(chunks, [None]):
+        final = chunk is None
+        buffer = buffer[pos:] + text_decoder.decode(chunk or b'', final=final)
+        pos = 0
+        if closed:
+            # после массива поток дочитывается до конца (например, чтобы
+            # ответ успел записаться в кэш), но там могут быть только пробелы
+            if buffer.strip():
+                raise ValueError("лишние данные после массива JSON")
+            buffer = ''
+            continue
+        while True:
+            pos = _JSON_WHITESPACE.match(buffer, pos).end()
+            if pos == len(buffer):
+                break
+            if not started:
+                if buffer[pos] != '[':
+                    raise ValueError("ожидался массив JSON")
+                started, pos = True, pos + 1
+                continue
+            if buffer[pos] == ']':
+                if after_comma:
+                    raise ValueError("запятая перед концом массива JSON")
+                closed, buffer, pos = True, buffer[pos + 1:], 0
+                if buffer.strip():
+                    raise ValueError("лишние данные после массива JSON")
+                break
+            if after_item:
+                if buffer[pos] != ',':
+                    raise ValueError("ожидалась запятая между элементами массива JSON")
+                after_item, after_comma, pos = False, True, pos + 1
+                continue
+            if buffer[pos] == ',':
+                raise ValueError("лишняя запятая в массиве JSON")
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if final:
+                    raise
+                break  # элемент пришел не целиком - ждем следующий блок
+            if end == len(buffer) and not final:
+                break  # число в конце блока могло оборваться
+            yield item
+            after_item, after_comma, pos = True, False, end
+    if not closed:
+        raise ValueError("массив JSON не закрыт")
+
+
+class Repo(NamedTuple):
+    name: str
+    language: Optional[str]
+    created_at: datetime.datetime
+
+
+def _repo(item: dict) -> Repo:
+    # Дата в формате ISO 8601 ("2013-07-05T02:02:28Z") разбирается один раз
+    created_at = datetime.datetime.fromisoformat(item['created_at'].replace('Z', '+00:00'))
+    return Repo(item['name'], item.get('language'), created_at)
+
+
+def _with_page(url: str, page: int) -> str:
+    parts = urlsplit(url)
+    query = dict(parse_qsl(parts.query))
+    query['page'] = str(page)
+    return parts._replace(query=urlencode(query)).geturl()
+
+
+def _link_urls(link_header: Optional[str]) -> Dict[str, str]:
+    """{rel: url} из заголовка Link ('<url>; rel="next", <url>; rel="last"')"""
+    urls = {}
+    for part in (link_header or '').split(','):
+        match = re.match(r'\s*<([^>]*)>\s*;\s*rel="?([^";]+)"?', part)
+        if match:
+            urls[match.group(2)] = match.group(1)
+    return urls
+
+
+class GitHubClient:
+    def __init__(self, crawler: Crawler,
+                 api_url: str = 'https://api.github.com',
+                 per_page: int = 100) -> None:
+        self.crawler = crawler
+        self.api_url = api_url
+        self.per_page = per_page
+
+    def _page(self, url: str) -> Tuple[Dict[str, str], List[Repo]]:
+        headers, chunks = self.crawler.stream(url)
+        return _link_urls(headers.get('Link')), [_repo(item) for item in iter_json_array(chunks)]
+
+    def user_repos(self, user: str) -> List[Repo]:
+        """Все хранилища пользователя (в порядке страниц API)"""
+        first_url = f"{self.api_url}/users/{user}/repos?{urlencode({'per_page': self.per_page})}"
+        links, repos = self._page(first_url)
+
+        if 'last' in links:
+            # номера страниц известны заранее - скачиваем их одновременно
+            last_page = int(dict(parse_qsl(urlsplit(links['last']).query))['page'])
+            urls = [_with_page(links['last'], page) for page in range(2, last_page + 1)]
+            with ThreadPoolExecutor(self.crawler.max_workers) as pool:
+                for _, page_repos in pool.map(self._page, urls):
+                    repos.extend(page_repos)
+        else:
+            while 'next' in links:
+                links, page_repos = self._page(links['next'])
+                repos.extend(page_repos)
+        return repos
+
+
+def last_repos(repos: Iterable[Repo], n: int = 5) -> List[Repo]:
+    """n последних созданных хранилищ (куча вместо сортировки всего списка)"""
+    return heapq.nlargest(n, repos, key=lambda repo: repo.created_at)
+
+
+# Потоковые egrep и line_count для больших файлов.
+# Вход читается двоичными блоками по CHUNK_SIZE байт; блок декодируется
+# в текст, только если от этого зависит результат поиска (compile_pattern).
+# Регулярное выражение компилируется один раз, а строки блока
+# фильтруются одним вызовом filter. Перевод строки считается методом
+# bytes.count по всему блоку. С --jobs N файл делится на диапазоны байт
+# по границам строк, диапазоны обрабатываются в пуле процессов, а результаты
+# выводятся в исходном порядке. Концом строки считается только b'\n'.
+# Запуск:
+#   python -m chapters.getting_data egrep "[0-9]" big.log --jobs 4
+#   cat big.log | python -m chapters.getting_data line_count
+import argparse
+import io
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import BinaryIO, Iterator, List, Optional, Pattern, Tuple
+
+CHUNK_SIZE = 1 << 20      # байт за одно чтение
+RANGE_SIZE = 64 << 20     # байт на одно задание в режиме --jobs
+
+
+def _line_blocks(stream: BinaryIO, limit: Optional[int] = None) -> Iterator[bytes]:
+    """Блоки из целых строк (последний блок может не оканчиваться
+       переводом строки); limit - сколько байт прочитать не больше"""
+    tail = b''
+    while limit is None or limit > 0:
+        chunk = stream.read(CHUNK_SIZE if limit is None else min(CHUNK_SIZE, limit))
+        if not chunk:
+            break
+        if limit is not None:
+            limit -= len(chunk)
+        end = chunk.rfind(b'\n') + 1
+        if end == 0:
+            tail += chunk
+            continue
+        yield tail + chunk[:end]
+        tail = chunk[end:]
+    if tail:
+        yield tail
+
+
+def _literal(pattern: Pattern[bytes]) -> Optional[bytes]:
+    """Текст шаблона, если в нем нет специальных символов"""
+    source = pattern.pattern
+    if source and not pattern.flags & re.IGNORECASE and re.escape(source) == source:
+        return source
+    return None
+
+
+def _grep_literal(literal: bytes, block: bytes) -> Iterator[bytes]:
+    """Строки блока, содержащие literal: поиск bytes.find по всему блоку,
+       без разбиения на строки"""
+    find = block.find
+    start = find(literal)
+    while start >= 0:
+        line_start = block.rfind(b'\n', 0, start) + 1
+        line_end = find(b'\n', start) + 1 or len(block)
+        yield block[line_start:line_end]
+        start = find(literal, line_end)
+
+
+# Признаки шаблона, который для байт и для текста работает по-разному:
+# классы \w, \d, \s, \b, точка и [^...] сопоставляются с одним байтом
+# вместо символа Unicode, (?i) учитывает регистр только букв ASCII,
+# \x80-\xff и \200-\377 означают байт, а не символ Latin-1, а \N, \u, \U
+# и флаг u в байтовом шаблоне недопустимы
+_UNICODE_SENSITIVE = re.compile(r'\\[wWdDsSbBNuU]|\\x[89a-fA-F]|\\[23][0-7]{2}'
+                                r'|\.|\[\^|\(\?[a-zA-Z-]*[iu]')
+
+
+def compile_pattern(regex: str) -> Pattern:
+    """Шаблон для grep_lines: по байтам, если результат не отличается от
+       поиска по тексту (ASCII без классов, зависящих от Unicode, или любая
+       строка без специальных символов - UTF-8 самосинхронизируется),
+       иначе по тексту"""
+    if re.escape(regex) == regex or (regex.isascii() and not _UNICODE_SENSITIVE.search(regex)):
+        try:
+            return re.compile(regex.encode())
+        except re.error:
+            pass  # ошибку, если она есть и в тексте, покажет re.compile ниже
+    return re.compile(regex)
+
+
+def grep_lines(pattern: Pattern, stream: BinaryIO,
+               limit: Optional[int] = None) -> Iterator[bytes]:
+    """Строки stream (с переводом строки), в которых найден pattern.
+       Байтовый шаблон применяется к байтам; для текстового шаблона блок
+       декодируется из UTF-8 (неверные байты сохраняются как есть), как
+       при построчном чтении текста"""
+    if isinstance(pattern.pattern, str):
+        search = pattern.search
+        for block in _line_blocks(stream, limit):
+            text = block.decode('utf-8', errors='surrogateescape')
+            for line in filter(search, io.StringIO(text, newline='\n')):
+                yield line.encode('utf-8', errors='surrogateescape')
+        return
+
+    literal = _literal(pattern)
+    search = pattern.search
+    for block in _line_blocks(stream, limit):
+        if literal is not None:
+            yield from _grep_literal(literal, block)
+        else:
+            yield from filter(search, io.BytesIO(block))  # строки по b'\n'
+
+
+def count_lines(stream: BinaryIO, limit: Optional[int] = None) -> int:
+    """Число строк, как у for line in stream: последняя строка
+       без перевода строки тоже считается"""
+    count = 0
+    last = b'\n'
+    while limit is None or limit > 0:
+        chunk = stream.read(CHUNK_SIZE if limit is None else min(CHUNK_SIZE, limit))
+        if not chunk:
+            break
+        if limit is not None:
+            limit -= len(chunk)
+        count += chunk.count(b'\n')
+        last = chunk[-1:]
+    return count + (last != b'\n')
+
+
+def line_ranges(path: str, range_size: int = RANGE_SIZE) -> List[Tuple[int, int]]:
+    """Делит файл на диапазоны байт [start, end) примерно по range_size,
+       каждая граница сдвигается на начало следующей строки"""
+    size = os.path.getsize(path)
+    bounds = [0]
+    with open(path, 'rb') as f:
+        while bounds[-1] + range_size < size:
+            f.seek(bounds[-1] + range_size - 1)
+            f.readline()  # дочитать до конца строки, в которую попали
+            if f.tell() >= size:
+                break
+            bounds.append(f.tell())
+    bounds.append(size)
+    return list(zip(bounds, bounds[1:]))
+
+
+def _grep_range(pattern: Pattern, path: str, start: int, end: int) -> bytes:
+    with open(path, 'rb') as f:
+        f.seek(start)
+        return b''.join(grep_lines(pattern, f, end - start))
+
+
+def _count_range(path: str, start: int, end: int) -> int:
+    with open(path, 'rb') as f:
+        f.seek(start)
+        return count_lines(f, end - start)
+
+
+def _map_ranges(fn, path: str, jobs: int, *args) -> Iterator:
+    """Результаты fn(*args, path, start, end) по диапазонам файла в исходном
+       порядке; в работе не больше 2 * jobs диапазонов"""
+    with ProcessPoolExecutor(jobs) as pool:
+        pending: deque = deque()
+        for start, end in line_ranges(path):
+            pending.append(pool.submit(fn, *args, path, start, end))
+            if len(pending) >= 2 * jobs:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _open_input(path: Optional[str]) -> BinaryIO:
+    return open(path, 'rb') if path is not None else sys.stdin.buffer
+
+
+def egrep_main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='egrep',
+                                     description="Выводит строки, соответствующие регулярному выражению")
+    parser.add_argument('regex')
+    parser.add_argument('path', nargs='?', help="файл (по умолчанию stdin)")
+    parser.add_argument('--jobs', type=int, default=1, help="процессов для файла")
+    args = parser.parse_args(argv)
+
+    pattern = compile_pattern(args.regex)
+    out = sys.stdout.buffer
+    if args.jobs > 1 and args.path is not None:
+        for matched in _map_ranges(_grep_range, args.path, args.jobs, pattern):
+            out.write(matched)
+    else:
+        stream = _open_input(args.path)
+        try:
+            out.writelines(grep_lines(pattern, stream))
+        finally:
+            if args.path is not None:
+                stream.close()
+    out.flush()
+    return 0
+
+
+def line_count_main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='line_count', description="Считает строки")
+    parser.add_argument('path', nargs='?', help="файл (по умолчанию stdin)")
+    parser.add_argument('--jobs', type=int, default=1, help="процессов для файла")
+    args = parser.parse_args(argv)
+
+    if args.jobs > 1 and args.path is not None:
+        count = sum(_map_ranges(_count_range, args.path, args.jobs))
+    else:
+        stream = _open_input(args.path)
+        try:
+            count = count_lines(stream)
+        finally:
+            if args.path is not None:
+                stream.close()
+    print(count)
+    return 0
+
+
+COMMANDS = {'egrep': egrep_main, 'line_count': line_count_main}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] not in COMMANDS:
+        print(f"Применение: python -m chapters.getting_data {{{','.join(COMMANDS)}}} ...",
+              file=sys.stderr)
+        return 1
+    return COMMANDS[argv[0]](argv[1:])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,4 @@
-from chapters.linear_algebra import Vector, dot
+from chapters.linear_algebra import Vector, Matrix, dot, get_backend
 
 
 def sum_of_squares(v: Vector) -> float:
@@ -6,7 +6,7 @@ def sum_of_squares(v: Vector) -> float:
     return dot(v, v)
 
 
-from typing import Callable
+from typing import Callable, List, Tuple
 
 
 def difference_quotient(f: Callable[[float], float],
@@ -26,18 +26,82 @@ def partial_difference_quotient(f: Callable[[Vector], float],
     return (f(w) - f(v)) / h
 
 
+# Вычислительно ресурсоемко вычислять разностное отношение каждый раз,
+# поэтому estimate_gradient вычисляет f(v) один раз и сдвигает
+# единственную копию v на месте: n + 1 вызовов f вместо 2n и без n копий v.
+# central=True - центральные разности (f(v + h) - f(v - h)) / 2h:
+# 2n вызовов, но ошибка O(h^2) вместо O(h).
+# processes > 1 вычисляет f в сдвинутых точках в пуле процессов
+# (f должна быть функцией уровня модуля, чтобы ее можно было передать в процесс)
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+
+def _shifted_points(v: Vector, h: float, central: bool) -> List[Vector]:
+    points = []
+    for i in range(len(v)):
+        for shift in ((h, -h) if central else (h,)):
+            w = list(v)
+            w[i] += shift
+            points.append(w)
+    return points
+
+
 def estimate_gradient(f: Callable[[Vector], float],
                       v: Vector,
-                      h: float = 0.0001):
-    return [partial_difference_quotient(f, v, i, h)
-            for i in range(len(v))]
-
-# Вычислительно ресурсоемко вычислять разностное отношение каждый раз
+                      h: float = 0.0001,
+                      central: bool = False,
+                      processes: Optional[int] = None) -> Vector:
+    """Оценивает градиент f в v разностными отношениями.
+       f не должна сохранять переданный ей вектор: он изменяется на месте"""
+    if processes is not None and processes > 1:
+        points = _shifted_points(v, h, central)
+        if not central:
+            points.append(list(v))
+        with ProcessPoolExecutor(processes) as pool:
+            values = list(pool.map(f, points, chunksize=max(1, len(points) // (4 * processes))))
+        if central:
+            return [(values[2 * i] - values[2 * i + 1]) / (2 * h) for i in range(len(v))]
+        f_v = values.pop()
+        return [(f_w - f_v) / h for f_w in values]
+
+    w = list(v)
+    gradient = []
+    if central:
+        for i, v_i in enumerate(v):
+            w[i] = v_i + h
+            f_plus = f(w)
+            w[i] = v_i - h
+            f_minus = f(w)
+            w[i] = v_i
+            gradient.append((f_plus - f_minus) / (2 * h))
+    else:
+        f_v = f(v)
+        for i, v_i in enumerate(v):
+            w[i] = v_i + h  # Добавит h только в i-ый элемент
+            gradient.append((f(w) - f_v) / h)
+            w[i] = v_i
+    return gradient
+
+
+def check_gradient(f: Callable[[Vector], float],
+                   gradient_fn: Callable[[Vector], Vector],
+                   v: Vector,
+                   h: float = 1e-5) -> float:
+    """Сравнивает аналитический градиент gradient_fn(v) с численной оценкой
+       (центральные разности) и возвращает наибольшую относительную ошибку
+       по координатам"""
+    analytic = gradient_fn(v)
+    numeric = estimate_gradient(f, v, h, central=True)
+    assert len(analytic) == len(numeric), "градиент должен иметь размерность v"
+    return max((abs(a - b) / max(abs(a), abs(b), 1e-12)
+                for a, b in zip(analytic, numeric)), default=0.0)
 
 
 # Использование Градиента
+import math
 import random
-from chapters.linear_algebra import distance, add, scalar_multiply
+from chapters.linear_algebra import add, scalar_multiply
 
 
 def gradient_step(v: Vector, gradient: Vector, step_size: float) -> Vector:
@@ -52,24 +116,6 @@ def sum_of_squares_gradient(v: Vector) -> Vector:
     return [2 * v_i for v_i in v]
 
 
-# Подобрать случайную отправную точку
-v = [random.uniform(-10, 10) for i in range(3)]
-
-for epoch in range(1000):
-    grad = sum_of_squares_gradient(v)  # Вычислить градиент в v
-    v = gradient_step(v, grad, -0.01)  # Сделать отрицательный градиентный шаг
-
-    print(epoch, v)
-
-
-assert distance(v, [0, 0, 0]) < 0.00001  # v должно быть близко к 0
-
-
-# простой пример (поиск углового коэф-та)
-# х изменяется в интервале от -50 до 49, у всегда равно 20 * х + 5
-inputs = [(x, 20 * x + 5) for x in range(-50, 50)]
-
-
 # Линейный градиент
 def linear_gradient(x: float, y: float, theta: Vector) -> Vector:
     slope, intercept = theta           # Наклон и пересечение
@@ -80,31 +126,250 @@ def linear_gradient(x: float, y: float, theta: Vector) -> Vector:
     return grad
 
 
-# 1) Начать со случайного значения theta
-# 2) Вычислить среднее значение градиентов
-# 3) Скорректировать theta в этом направлении
-# 4) Повторить
-
-from linear_algebra import vector_mean
-
+# Оптимизаторы: правила шага поверх gradient_step.
+# У каждого оптимизатора метод step(theta, grad) -> новое theta, поэтому он
+# подходит и для полного пакета, и для мини-пакетов, и для стохастического спуска:
+#     theta = optimizer.step(theta, grad)
+# Состояние (скорости, накопленные квадраты градиентов) хранится в буферах,
+# которые создаются один раз при первом шаге и дальше обновляются на месте
+class Optimizer:
+    """Обычный градиентный спуск с постоянным шагом"""
 
-# Начать со случайных значений наклона и пересечения
-theta = [random.uniform(-1, 1), random.uniform(-1, 1)]
+    def __init__(self, learning_rate: float = 0.001) -> None:
+        self.learning_rate = learning_rate
 
-learning_rate = 0.001  # Темп усвоения
-
-for epoch in range(5000):
-    # Вычислить среднее значение градиентов
-    grad = vector_mean([linear_gradient(x, y, theta) for x, y in inputs])
-
-    # Сделать шаг в этом направлении
-    theta = gradient_step(theta, grad, -learning_rate)
-    print(epoch, theta)
-
-
-slope, intercept = theta
-assert 19.9 < slope < 20.1, "наклон должен быть равен примерно 20"
-assert 4.9 < intercept < 5.1, "пересечение должно быть равным примерно 5"
+    def reset(self) -> None:
+        """Сбрасывает накопленное состояние"""
+
+    def direction(self, theta: Vector, grad: Vector) -> Vector:
+        """Направление шага (шаг делается против него)"""
+        return grad
+
+    def step(self, theta: Vector, grad: Vector) -> Vector:
+        return gradient_step(theta, self.direction(theta, grad), -self.learning_rate)
+
+
+class Momentum(Optimizer):
+    """Спуск с инерцией: v = momentum * v + grad"""
+
+    def __init__(self, learning_rate: float = 0.001, momentum: float = 0.9,
+                 nesterov: bool = False) -> None:
+        super().__init__(learning_rate)
+        self.momentum = momentum
+        self.nesterov = nesterov
+        self.velocity: List[float] = []
+
+    def reset(self) -> None:
+        self.velocity = []
+
+    def direction(self, theta: Vector, grad: Vector) -> Vector:
+        if not self.velocity:
+            self.velocity = [0.0] * len(grad)
+        velocity, momentum = self.velocity, self.momentum
+        for i, g in enumerate(grad):
+            velocity[i] = momentum * velocity[i] + g
+        if self.nesterov:
+            # Шаг "с заглядыванием вперед" вдоль новой скорости
+            return [g + momentum * v for g, v in zip(grad, velocity)]
+        return velocity
+
+
+class Nesterov(Momentum):
+    """Ускоренный градиент Нестерова"""
+
+    def __init__(self, learning_rate: float = 0.001, momentum: float = 0.9) -> None:
+        super().__init__(learning_rate, momentum, nesterov=True)
+
+
+class AdaGrad(Optimizer):
+    """Шаг по каждой координате делится на корень суммы квадратов ее градиентов"""
+
+    def __init__(self, learning_rate: float = 0.1, eps: float = 1e-8) -> None:
+        super().__init__(learning_rate)
+        self.eps = eps
+        self.squares: List[float] = []
+
+    def reset(self) -> None:
+        self.squares = []
+
+    def direction(self, theta: Vector, grad: Vector) -> Vector:
+        if not self.squares:
+            self.squares = [0.0] * len(grad)
+        squares = self.squares
+        for i, g in enumerate(grad):
+            squares[i] += g * g
+        return [g / (math.sqrt(s) + self.eps) for g, s in zip(grad, squares)]
+
+
+class RMSProp(AdaGrad):
+    """Как AdaGrad, но квадраты градиентов усредняются экспоненциально"""
+
+    def __init__(self, learning_rate: float = 0.01, decay: float = 0.9,
+                 eps: float = 1e-8) -> None:
+        super().__init__(learning_rate, eps)
+        self.decay = decay
+
+    def direction(self, theta: Vector, grad: Vector) -> Vector:
+        if not self.squares:
+            self.squares = [0.0] * len(grad)
+        squares, decay = self.squares, self.decay
+        for i, g in enumerate(grad):
+            squares[i] = decay * squares[i] + (1 - decay) * g * g
+        return [g / (math.sqrt(s) + self.eps) for g, s in zip(grad, squares)]
+
+
+class Adam(Optimizer):
+    """Adam: экспоненциальные средние градиента и его квадрата
+       с поправкой на смещение"""
+
+    def __init__(self, learning_rate: float = 0.01, beta1: float = 0.9,
+                 beta2: float = 0.999, eps: float = 1e-8) -> None:
+        super().__init__(learning_rate)
+        self.beta1, self.beta2, self.eps = beta1, beta2, eps
+        self.reset()
+
+    def reset(self) -> None:
+        self.t = 0
+        self.m: List[float] = []
+        self.v: List[float] = []
+
+    def direction(self, theta: Vector, grad: Vector) -> Vector:
+        if not self.m:
+            self.m, self.v = [0.0] * len(grad), [0.0] * len(grad)
+        m, v, beta1, beta2 = self.m, self.v, self.beta1, self.beta2
+        self.t += 1
+        for i, g in enumerate(grad):
+            m[i] = beta1 * m[i] + (1 - beta1) * g
+            v[i] = beta2 * v[i] + (1 - beta2) * g * g
+        m_correction = 1 - beta1 ** self.t
+        v_correction = 1 - beta2 ** self.t
+        return [(m_i / m_correction) / (math.sqrt(v_i / v_correction) + self.eps)
+                for m_i, v_i in zip(m, v)]
+
+
+def backtracking_line_search(f: Callable[[Vector], float],
+                             theta: Vector,
+                             grad: Vector,
+                             step_size: float = 1.0,
+                             shrink: float = 0.5,
+                             c: float = 1e-4,
+                             max_steps: int = 50) -> float:
+    """Уменьшает step_size, пока шаг против градиента не уменьшит f
+       достаточно (условие Армихо): f(theta - s*grad) <= f(theta) - c*s*|grad|^2"""
+    f_theta = f(theta)
+    grad_squared = dot(grad, grad)
+    for _ in range(max_steps):
+        if f(gradient_step(theta, grad, -step_size)) <= f_theta - c * step_size * grad_squared:
+            break
+        step_size *= shrink
+    return step_size
+
+
+class LineSearch(Optimizer):
+    """Градиентный спуск, подбирающий шаг линейным поиском по функции потерь f
+       (на полном пакете). Следующий поиск начинается с удвоенного
+       последнего удачного шага"""
+
+    def __init__(self, f: Callable[[Vector], float], learning_rate: float = 1.0,
+                 shrink: float = 0.5, c: float = 1e-4) -> None:
+        super().__init__(learning_rate)
+        self.f, self.shrink, self.c = f, shrink, c
+        self.initial_learning_rate = learning_rate
+
+    def reset(self) -> None:
+        self.learning_rate = self.initial_learning_rate
+
+    def step(self, theta: Vector, grad: Vector) -> Vector:
+        self.learning_rate = backtracking_line_search(self.f, theta, grad,
+                                                      2 * self.learning_rate,
+                                                      self.shrink, self.c)
+        return gradient_step(theta, grad, -self.learning_rate)
+
+
+# Обучение линейной модели полным пакетом
+# Градиент среднего квадрата ошибки по всем примерам сразу:
+#   grad = 2/n * (X^T X theta - X^T y),
+# где X - входы с дополнительным столбцом единиц (для пересечения).
+# X^T X и X^T y считаются один раз, после чего эпоха стоит O(d^2)
+# независимо от числа примеров и не создает списков градиентов по примерам
+import numbers
+import warnings
+from typing import Optional, Sequence, Union
+
+from chapters.linear_algebra import magnitude
+
+
+def _augment(x: Union[float, Vector]) -> Vector:
+    """Входы x (число или вектор) плюс 1 для пересечения"""
+    return [x, 1.0] if isinstance(x, numbers.Real) else [*x, 1.0]
+
+
+def linear_sufficient_statistics(xs: Sequence[Union[float, Vector]],
+                                 ys: Sequence[float]) -> Tuple[Matrix, Vector]:
+    """Возвращает (X^T X / n, X^T y / n) для входов с единичным столбцом"""
+    assert len(xs) == len(ys), "xs и ys должны иметь одинаковое число элементов"
+    n = len(xs)
+    rows = [_augment(x) for x in xs]
+    dim = len(rows[0])
+
+    if get_backend() == 'numpy':
+        import numpy as np
+        X, y = np.array(rows, dtype=float), np.array(ys, dtype=float)
+        return ((X.T @ X) / n).tolist(), ((X.T @ y) / n).tolist()
+
+    xtx = [[0.0] * dim for _ in range(dim)]
+    xty = [0.0] * dim
+    for row, y in zip(rows, ys):
+        for i, row_i in enumerate(row):
+            xty[i] += row_i * y
+            xtx_i = xtx[i]
+            for j in range(i, dim):
+                xtx_i[j] += row_i * row[j]
+    for i in range(dim):
+        xty[i] /= n
+        for j in range(i, dim):
+            xtx[i][j] /= n
+            xtx[j][i] = xtx[i][j]
+    return xtx, xty
+
+
+def fit_linear(xs: Sequence[Union[float, Vector]],
+               ys: Sequence[float],
+               theta: Optional[Vector] = None,
+               learning_rate: float = 0.001,
+               max_epochs: int = 5000,
+               tolerance: float = 1e-9,
+               callback: Optional[Callable[[int, Vector], None]] = None,
+               optimizer: Optional[Optimizer] = None) -> Vector:
+    """Подбирает theta = [коэффициенты..., пересечение] градиентным спуском
+       по среднему квадрату ошибки. Для одномерных xs это [наклон, пересечение],
+       как в linear_gradient. Останавливается, когда длина градиента
+       меньше tolerance, или через max_epochs эпох - тогда выдается
+       предупреждение RuntimeWarning (спуск не сошелся).
+       callback(epoch, theta) вызывается после каждой эпохи.
+       optimizer задает правило шага (по умолчанию Optimizer(learning_rate))"""
+    xtx, xty = linear_sufficient_statistics(xs, ys)
+    if theta is None:
+        theta = [0.0] * len(xty)
+    assert len(theta) == len(xty), "theta должен иметь по элементу на вход и пересечение"
+    if optimizer is None:
+        optimizer = Optimizer(learning_rate)
+
+    for epoch in range(max_epochs):
+        grad = [2 * (dot(xtx_i, theta) - xty_i) for xtx_i, xty_i in zip(xtx, xty)]
+        if magnitude(grad) < tolerance:
+            break
+        theta = optimizer.step(theta, grad)
+        if callback is not None:
+            callback(epoch, theta)
+    else:
+        grad = [2 * (dot(xtx_i, theta) - xty_i) for xtx_i, xty_i in zip(xtx, xty)]
+        if magnitude(grad) >= tolerance:
+            warnings.warn(f"fit_linear не сошелся за {max_epochs} эпох: длина градиента "
+                          f"{magnitude(grad):.3g} >= tolerance {tolerance:g}; увеличьте "
+                          f"max_epochs или learning_rate", RuntimeWarning, stacklevel=2)
+
+    return [float(theta_i) for theta_i in theta]
 
 
 # мини-пакетный градиентный спуск
@@ -128,32 +393,123 @@ def mini_batches(dataset: List[T],
         yield dataset[start:end]
 
 
-theta = [random.uniform(-1, 1), random.uniform(-1, 1)]
-
-for epoch in range(1000):
-    for batch in mini_batches(inputs, batch_size=20):
-        grad = vector_mean([linear_gradient(x, y, theta) for x, y in batch])
-        theta = gradient_step(theta, grad, -learning_rate)
-    print(epoch, theta)
-
-
-slope, intercept = theta
-assert 19.9 < slope < 20.1, "наклон должен быть равен примерно 20"
-assert 4.9 < intercept < 5.1, "пересечение должно быть равным примерно 5"
-
-
-# Стохастический градиентный спуск
-# шаги делаются на основе одного тренировочного примера за раз
-
-theta = [random.uniform(-1, 1), random.uniform(-1, 1)]
-
-for epoch in range(100):
-    for x, y in inputs:
-        grad = linear_gradient(x, y, theta)
-        theta = gradient_step(theta, grad, -learning_rate)
-        print(epoch, theta)
-
-
-slope, intercept = theta
-assert 19.9 < slope < 20.1, "наклон должен быть равен примерно 20"
-assert 4.9 < intercept < 5.1, "пересечение должно быть равным примерно 5"
+# Мини-пакеты без копирования данных
+# Каждую эпоху перемешивается перестановка индексов (массив array('q')),
+# а пакет - это представление BatchView: набор данных + срез перестановки
+# (memoryview, тоже без копирования). Подходит для больших наборов данных,
+# например memoryview над mmap-файлом или numpy.memmap
+import array
+import queue
+import threading
+from typing import Sequence
+
+
+class BatchView(Sequence):
+    """Пакет как представление: элементы читаются из dataset по индексам
+       только при обращении"""
+
+    def __init__(self, dataset: Sequence[T], indices: Sequence[int]) -> None:
+        self.dataset = dataset
+        self.indices = indices
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return BatchView(self.dataset, self.indices[i])
+        return self.dataset[self.indices[i]]
+
+    def __iter__(self) -> Iterator[T]:
+        dataset = self.dataset
+        return (dataset[i] for i in self.indices)
+
+
+def index_batches(n: int,
+                  batch_size: int,
+                  shuffle: bool = True,
+                  drop_last: bool = False,
+                  pad: bool = False,
+                  rng: Optional[random.Random] = None) -> Iterator[Sequence[int]]:
+    """Генерирует индексы пакетов одной эпохи для набора из n примеров.
+       Без перемешивания пакеты - объекты range, с перемешиванием - срезы
+       memoryview новой перестановки. Неполный последний пакет
+       отбрасывается (drop_last) или дополняется примерами с начала
+       эпохи (pad)"""
+    assert not (drop_last and pad), "drop_last и pad взаимоисключающие"
+    if shuffle:
+        permutation = array.array('q', range(n))
+        (rng or random).shuffle(permutation)
+        order = memoryview(permutation)
+    else:
+        order = range(n)
+
+    for start in range(0, n, batch_size):
+        end = start + batch_size
+        if end <= n:
+            yield order[start:end]
+        elif drop_last:
+            return
+        elif pad and n:
+            # Индексы из начала той же эпохи; копируется только хвост
+            yield [*order[start:n], *(order[i % n] for i in range(end - n))]
+        else:
+            yield order[start:n]
+
+
+def mini_batch_views(dataset: Sequence[T],
+                     batch_size: int,
+                     shuffle: bool = True,
+                     drop_last: bool = False,
+                     pad: bool = False,
+                     rng: Optional[random.Random] = None) -> Iterator[BatchView]:
+    """Как mini_batches, но примеры перемешиваются между пакетами,
+       и пакеты не копируют данные"""
+    for indices in index_batches(len(dataset), batch_size, shuffle, drop_last, pad, rng):
+        yield BatchView(dataset, indices)
+
+
+_DONE = object()  # Маркер конца потока пакетов
+
+
+def prefetch(batches: Iterator[T],
+             buffer_size: int = 1,
+             load: Optional[Callable[[T], T]] = None) -> Iterator[T]:
+    """Готовит следующие buffer_size пакетов в фоновом потоке,
+       пока текущий обрабатывается. load (например, list для BatchView)
+       применяется к пакету тоже в фоновом потоке"""
+    buffer: queue.Queue = queue.Queue(maxsize=buffer_size)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        """Кладет item в буфер; False, если потребитель уже остановился"""
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce() -> None:
+        try:
+            for batch in batches:
+                if not put(load(batch) if load is not None else batch):
+                    return
+        except BaseException as e:  # ошибка передается потребителю
+            put(e)
+            return
+        put(_DONE)
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is _DONE:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
@@ -11,7 +11,7 @@ def normal_approximation_to_binomial(n: int, p: float) -> Tuple[float, float]:
     return mu, sigma
 
 
-from chapters.probability import normal_cdf
+from chapters.probability import normal_cdf, erfc_array, SQRT_TWO
 
 # Нормальная функция CDF (normal_cdf) - это вероятность,
 # что переменная лежит ниже порога
@@ -80,32 +80,6 @@ def normal_two_sided_bounds(probability: float,
     return lower_bound, upper_bound
 
 
-mu_0, sigma_0 = normal_approximation_to_binomial(1000, 0.5)
-
-# Принимаем значимость = 5%
-
-# (469, 531)
-lower_bound, upper_bound = normal_two_sided_bounds(0.95, mu_0, sigma_0)
-
-
-# 95%-ные границы, основанные на допущении, что p = 0.5
-lo, hi = normal_two_sided_bounds(0.95, mu_0, sigma_0)
-
-# Фактические mu и sigma, основанные на p = 0.55
-mu_1, sigma_1 = normal_approximation_to_binomial(1000, 0.55)
-
-# Ошибка 2-го рода означает, что нам не удалось отклонить нулевую гипотезу,
-# что произойдет, когда Х все еще внутри нашего исходного интервала
-type_2_probability = normal_probability_between(lo, hi, mu_1, sigma_1)
-power = 1 - type_2_probability  # ~0.8865
-
-hi = normal_upper_bound(0.95, mu_0, sigma_0)
-# равно 526 (< 531, т. к. нам нужно больше вероятности в верхнем хвосте)
-
-type_2_probability = normal_probability_below(hi, mu_1, sigma_1)
-power = 1 - type_2_probability  # ~0.9364
-
-
 # P-значения
 # Двустороннее p-значение
 def two_sided_p_value(x: float, mu: float = 0, sigma: float = 1) -> float:
@@ -126,7 +100,7 @@ upper_p_value = normal_probability_above
 lower_p_value = normal_probability_below
 
 
-from typing import List
+from typing import List, Optional
 
 
 def run_experiment() -> List[bool]:
@@ -141,15 +115,57 @@ def reject_fairness(experiment: List[bool]) -> bool:
     return num_heads < 469 or num_heads > 531
 
 
-random.seed(0)
-experiments = [run_experiment() for _ in range(1000)]
-
-num_rejections = len([experiment
-                      for experiment in experiments
-                      if reject_fairness(experiment)])
-
-
-assert num_rejections == 46, f'{num_rejections}'
+# Массовый прогон экспериментов: броски не сохраняются, считаются только орлы
+import functools
+from collections import Counter
+
+from chapters.probability import Sampler, simulate
+
+
+def _count_rejections(n_flips: int,
+                      p: float,
+                      rejection_bounds: Tuple[int, int],
+                      sampler: Sampler,
+                      n_experiments: int) -> Counter:
+    lo, hi = rejection_bounds
+    rejections = 0
+    for _ in range(n_experiments):
+        if p == 0.5:
+            # n_flips честных бросков - биты одного случайного числа
+            num_heads = sampler.coin_flips(n_flips).bit_count()
+        else:
+            num_heads = sampler.binomial(n_flips, p)
+        if num_heads < lo or num_heads > hi:
+            rejections += 1
+    return Counter(rejections=rejections)
+
+
+def count_rejections(n_flips: int = 1000,
+                     n_experiments: int = 1000,
+                     p: float = 0.5,
+                     rejection_bounds: Tuple[int, int] = (469, 531),
+                     seed: int = 0,
+                     processes: Optional[int] = None,
+                     compatible: bool = False) -> int:
+    """Проводит n_experiments экспериментов по n_flips бросков монеты
+       с вероятностью орла p и возвращает число экспериментов, в которых
+       число орлов вышло за rejection_bounds.
+       compatible=True воспроизводит поток random.seed(seed) +
+       run_experiment/reject_fairness (последовательно, без пула процессов);
+       иначе эксперименты генерируются пакетами и могут идти в processes процессах"""
+    if compatible:
+        lo, hi = rejection_bounds
+        rand = random.Random(seed).random
+        rejections = 0
+        for _ in range(n_experiments):
+            num_heads = sum(rand() < p for _ in range(n_flips))
+            if num_heads < lo or num_heads > hi:
+                rejections += 1
+        return rejections
+
+    trials_fn = functools.partial(_count_rejections, n_flips, p, rejection_bounds)
+    return simulate(trials_fn, n_experiments, seed=seed,
+                    chunk_size=1000, processes=processes)['rejections']
 
 
 # Проведение А/В тестирования
@@ -167,15 +183,251 @@ def a_b_test_statistic(N_A: int, n_A: int, N_B: int, n_B: int) -> float:
     return (p_B - p_A) / math.sqrt(sigma_A**2 + sigma_B**2)
 
 
+# Пакетная оценка A/B-тестов по многим вариантам сразу.
+# Оценки p и sigma считаются один раз на вариант, а не на каждую пару
+from typing import NamedTuple, Sequence
+
+from chapters.linear_algebra import get_backend
+
+
+class ABTestResult(NamedTuple):
+    a: int                   # индекс варианта A (например, контроль)
+    b: int                   # индекс варианта B
+    z: float                 # a_b_test_statistic(N_a, n_a, N_b, n_b)
+    p_value: float           # двустороннее p-значение z
+    adjusted_p_value: float  # с поправкой на множественные сравнения
+
+
+CORRECTIONS = (None, 'bonferroni', 'holm', 'benjamini-hochberg')
+
+
+def adjust_p_values(p_values: Sequence[float],
+                    correction: Optional[str]) -> List[float]:
+    """Поправка p-значений на множественные сравнения"""
+    if correction not in CORRECTIONS:
+        raise ValueError(f"неизвестная поправка {correction!r}, допустимые: {CORRECTIONS}")
+    m = len(p_values)
+    if correction is None:
+        return list(p_values)
+    if get_backend() == 'numpy':
+        return _adjust_p_values_numpy(p_values, correction).tolist()
+    if correction == 'bonferroni':
+        return [min(1.0, m * p) for p in p_values]
+
+    adjusted = [0.0] * m
+    if correction == 'holm':
+        # по возрастанию p: (m - rank) * p, с накопленным максимумом
+        running = 0.0
+        for rank, i in enumerate(sorted(range(m), key=lambda i: p_values[i])):
+            running = max(running, min(1.0, (m - rank) * p_values[i]))
+            adjusted[i] = running
+    else:
+        # Бенджамини-Хохберг: по убыванию p: p * m / rank, с накопленным минимумом
+        running = 1.0
+        order = sorted(range(m), key=lambda i: p_values[i], reverse=True)
+        for rank, i in zip(range(m, 0, -1), order):
+            running = min(running, p_values[i] * m / rank)
+            adjusted[i] = running
+    return adjusted
+
+
+def _adjust_p_values_numpy(p_values, correction: str):
+    import numpy as np
+
+    p_values = np.asarray(p_values, dtype=float)
+    m = len(p_values)
+    if correction == 'bonferroni':
+        return np.minimum(1.0, m * p_values)
+    adjusted = np.empty(m)
+    if correction == 'holm':
+        order = np.argsort(p_values, kind='stable')
+        adjusted[order] = np.maximum.accumulate(
+            np.minimum(1.0, (m - np.arange(m)) * p_values[order]))
+    else:
+        order = np.argsort(-p_values, kind='stable')
+        adjusted[order] = np.minimum.accumulate(
+            np.minimum(1.0, p_values[order] * m / np.arange(m, 0, -1)))
+    return adjusted
+
+
+def _a_b_test_batch_numpy(Ns: Sequence[int], ns: Sequence[int], control: Optional[int]):
+    """Пары, z-статистики и p-значения всех сравнений одним векторным вычислением"""
+    import numpy as np
+
+    Ns, ns = np.asarray(Ns, dtype=float), np.asarray(ns, dtype=float)
+    ps = ns / Ns
+    variances = ps * (1 - ps) / Ns
+    k = len(ps)
+    if control is None:
+        a, b = np.triu_indices(k, 1)  # пары i < j в том же порядке, что и в цикле
+    else:
+        b = np.delete(np.arange(k), control)
+        a = np.full(len(b), control)
+
+    difference = ps[b] - ps[a]
+    sigma = np.sqrt(variances[a] + variances[b])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        zs = np.where(sigma > 0, difference / sigma, np.copysign(np.inf, difference))
+    zs[(sigma == 0) & (difference == 0)] = 0.0
+    # two_sided_p_value(z) через erfc, векторно для всего массива
+    p_values = erfc_array(np.abs(zs) / SQRT_TWO)
+    return list(zip(a.tolist(), b.tolist())), zs, p_values
+
+
+def a_b_test_batch(Ns: Sequence[int],
+                   ns: Sequence[int],
+                   control: Optional[int] = 0,
+                   correction: Optional[str] = None) -> List[ABTestResult]:
+    """Сравнивает варианты с показами Ns[i] и конверсиями ns[i].
+       control - индекс контрольного варианта (все остальные сравниваются с ним),
+       control=None - сравниваются все пары i < j"""
+    assert len(Ns) == len(ns), "Ns и ns должны иметь одинаковое число элементов"
+
+    if get_backend() == 'numpy':
+        pairs, zs, p_values = _a_b_test_batch_numpy(Ns, ns, control)
+        p_values = p_values.tolist()
+        return [ABTestResult(a, b, z, p_value, adjusted_p_value)
+                for (a, b), z, p_value, adjusted_p_value
+                in zip(pairs, zs.tolist(), p_values, adjust_p_values(p_values, correction))]
+
+    ps = [n / N for N, n in zip(Ns, ns)]
+    variances = [p * (1 - p) / N for p, N in zip(ps, Ns)]
+
+    if control is None:
+        pairs = [(a, b) for a in range(len(ps)) for b in range(a + 1, len(ps))]
+    else:
+        pairs = [(control, b) for b in range(len(ps)) if b != control]
+
+    zs = []
+    for a, b in pairs:
+        difference = ps[b] - ps[a]
+        sigma = math.sqrt(variances[a] + variances[b])
+        if sigma > 0:
+            zs.append(difference / sigma)
+        else:
+            # обе доли равны 0 или 1 - различие либо нулевое, либо бесконечно значимое
+            zs.append(math.copysign(math.inf, difference) if difference else 0.0)
+
+    # two_sided_p_value(z) для N(0, 1) через erfc - точнее в дальних хвостах
+    erfc = math.erfc
+    p_values = [erfc(abs(z) / SQRT_TWO) for z in zs]
+    adjusted = adjust_p_values(p_values, correction)
+
+    return [ABTestResult(a, b, z, p_value, adjusted_p_value)
+            for (a, b), z, p_value, adjusted_p_value in zip(pairs, zs, p_values, adjusted)]
+
+
 # Байесов вывод
 # бета-распределение
+# Нормализирующая константа считается в логарифмах через lgamma:
+# math.gamma переполняется уже при alpha, beta > ~170
+@functools.lru_cache(maxsize=4096)
+def log_B(alpha: float, beta: float) -> float:
+    """Логарифм нормализирующей константы B(alpha, beta),
+       запоминается для каждой пары (alpha, beta)"""
+    return math.lgamma(alpha) + math.lgamma(beta) - math.lgamma(alpha + beta)
+
+
 def B(alpha: float, beta: float) -> float:
     """Нормализирующая константа, чтобы полная
        вероятность в суме составляла 1"""
-    return math.gamma(alpha) * math.gamma(beta) / math.gamma(alpha + beta)
+    return math.exp(log_B(alpha, beta))
+
+
+def beta_log_pdf(x: float, alpha: float, beta: float) -> float:
+    if x <= 0 or x >= 1:  # за пределами [0, 1] нет веса
+        return -math.inf
+    return (alpha - 1) * math.log(x) + (beta - 1) * math.log1p(-x) - log_B(alpha, beta)
 
 
 def beta_pdf(x: float, alpha: float, beta: float) -> float:
     if x <= 0 or x >= 1:  # за пределами [0, 1] нет веса
         return 0
-    return x ** (alpha - 1) * (1 - x) ** (beta - 1) / B(alpha, beta)
+    return math.exp(beta_log_pdf(x, alpha, beta))
+
+
+# Апостериорные распределения многих экспериментов на общей сетке
+import bisect
+import itertools
+
+BetaParams = Tuple[float, float]  # (alpha, beta)
+
+
+class BetaGrid:
+    """Равномерная сетка середин интервалов на (0, 1) с заранее
+       посчитанными log(x) и log(1 - x); плотности, доверительные
+       интервалы и P(p_B > p_A) для многих бета-распределений считаются
+       на ней без повторных вызовов lgamma и log"""
+
+    def __init__(self, grid_size: int = 10_000) -> None:
+        self.dx = 1 / grid_size
+        self.xs = [(k + 0.5) * self.dx for k in range(grid_size)]
+        self.log_xs = [math.log(x) for x in self.xs]
+        self.log_1m_xs = [math.log1p(-x) for x in self.xs]
+        self._np_grid = None
+        if get_backend() == 'numpy':
+            import numpy as np
+            self._np_grid = np.array(self.log_xs), np.array(self.log_1m_xs)
+
+    def densities(self, params: Sequence[BetaParams]) -> List[List[float]]:
+        """Плотности beta_pdf(x, alpha, beta) во всех точках сетки,
+           по строке на каждую пару (alpha, beta)"""
+        if self._np_grid is not None:
+            import numpy as np
+            log_xs, log_1m_xs = self._np_grid
+            alphas = np.array([alpha for alpha, _ in params], dtype=float)[:, None]
+            betas = np.array([beta for _, beta in params], dtype=float)[:, None]
+            log_norms = np.array([log_B(alpha, beta) for alpha, beta in params])[:, None]
+            return np.exp((alphas - 1) * log_xs + (betas - 1) * log_1m_xs - log_norms)
+
+        exp = math.exp
+        return [[exp((alpha - 1) * log_x + (beta - 1) * log_1m_x - log_norm)
+                 for log_x, log_1m_x in zip(self.log_xs, self.log_1m_xs)]
+                for alpha, beta, log_norm in ((alpha, beta, log_B(alpha, beta))
+                                              for alpha, beta in params)]
+
+    def _cdfs(self, params: Sequence[BetaParams]) -> List[List[float]]:
+        """Функции распределения на сетке (нормированные к 1)"""
+        if self._np_grid is not None:
+            cdfs = self.densities(params).cumsum(axis=1)
+            return cdfs / cdfs[:, -1:]
+
+        cdfs = []
+        for row in self.densities(params):
+            cdf = list(itertools.accumulate(row))
+            total = cdf[-1]
+            cdfs.append([c / total for c in cdf])
+        return cdfs
+
+    def credible_intervals(self,
+                           params: Sequence[BetaParams],
+                           probability: float = 0.95) -> List[Tuple[float, float]]:
+        """Центральные доверительные (байесовские) интервалы с точностью до шага сетки"""
+        tail = (1 - probability) / 2
+        last = len(self.xs) - 1
+        return [(self.xs[min(bisect.bisect_left(cdf, tail), last)],
+                 self.xs[min(bisect.bisect_left(cdf, 1 - tail), last)])
+                for cdf in self._cdfs(params)]
+
+    def prob_greater(self,
+                     pairs: Sequence[Tuple[BetaParams, BetaParams]]) -> List[float]:
+        """Для каждой пары (A, B) апостериорных распределений возвращает P(p_B > p_A)"""
+        params = [dist for pair in pairs for dist in pair]
+        cdfs = self._cdfs(params)
+        if self._np_grid is not None:
+            import numpy as np
+            cdf_a, cdf_b = cdfs[::2], cdfs[1::2]
+            prev_a = np.pad(cdf_a[:, :-1], ((0, 0), (1, 0)))
+            prev_b = np.pad(cdf_b[:, :-1], ((0, 0), (1, 0)))
+            return ((cdf_b - prev_b) * (prev_a + cdf_a) / 2).sum(axis=1).tolist()
+
+        result = []
+        for cdf_a, cdf_b in zip(cdfs[::2], cdfs[1::2]):
+            # P(p_A < p_B) = сумма по ячейкам P(p_B в ячейке) * P(p_A ниже ее),
+            # внутри одной ячейки A ниже B с вероятностью 1/2
+            prob, prev_a, prev_b = 0.0, 0.0, 0.0
+            for a, b in zip(cdf_a, cdf_b):
+                prob += (b - prev_b) * (prev_a + a) / 2
+                prev_a, prev_b = a, b
+            result.append(prob)
+        return result
@@ -3,6 +3,70 @@ from typing import List
 Vector = List[float]
 
 
+# Выбор вычислительного движка (backend).
+# "python" - чистый Python на списках (по умолчанию),
+# "numpy" - векторизованная реализация из chapters.linear_algebra_numpy.
+# Движок можно задать переменной окружения DS_BOOK_BACKEND или функцией set_backend.
+# Переключение подменяет код самих функций этого модуля: на движке numpy
+# тело функции лишь передает вызов одноименной функции движка. Объекты функций
+# не меняются, поэтому переключаются и импорты под другим именем (as),
+# и ссылки в partial, аргументах по умолчанию и контейнерах, а на чистом
+# Python на каждом вызове нет ни проверки движка, ни лишней обертки
+import operator
+import os
+from types import CodeType
+from typing import Callable, Dict, Iterable, Iterator, Tuple
+
+BACKENDS = ('python', 'numpy')
+
+_backend_name = 'python'
+_backend = None  # модуль с реализацией; None - чистый Python
+_functions: Dict[str, Callable] = {}  # имя -> функция с переключаемым кодом
+_python_code: Dict[str, CodeType] = {}  # имя -> код на чистом Python
+_backend_code: Dict[str, CodeType] = {}  # имя -> код, вызывающий функцию движка
+
+_TO_BACKEND = """
+def {0}(*args, **kwargs):
+    return _backend.{0}(*args, **kwargs)
+"""
+
+
+def set_backend(name: str) -> None:
+    """Переключает все функции модуля на движок name"""
+    global _backend_name, _backend
+    if name not in BACKENDS:
+        raise ValueError(f"неизвестный движок {name!r}, допустимые: {BACKENDS}")
+
+    if name == 'numpy':
+        from chapters import linear_algebra_numpy  # требует установленного numpy
+        _backend = linear_algebra_numpy
+    else:
+        _backend = None
+
+    code = _python_code if _backend is None else _backend_code
+    for fn_name, fn in _functions.items():
+        fn.__code__ = code[fn_name]
+    _backend_name = name
+
+
+def get_backend() -> str:
+    """Возвращает имя текущего движка"""
+    return _backend_name
+
+
+def _dispatch(fn):
+    """Регистрирует fn как функцию, код которой set_backend заменяет
+       вызовом одноименной функции движка"""
+    name = fn.__name__
+    namespace: Dict[str, Callable] = {}
+    exec(compile(_TO_BACKEND.format(name), f"<backend {name}>", 'exec'), namespace)
+    _functions[name] = fn
+    _python_code[name] = fn.__code__
+    _backend_code[name] = namespace[name].__code__
+    return fn
+
+
+@_dispatch
 def add(v: Vector, w: Vector) -> Vector:
     """Складывает соответсвующие элементы"""
     assert len(v) == len(w), " векторы должны иметь одинаковую длину"
@@ -10,9 +74,7 @@ def add(v: Vector, w: Vector) -> Vector:
     return [v_i + w_i for v_i, w_i in zip(v, w)]
 
 
-assert add([1, 2, 3], [4, 5, 6]) == [5, 7, 9]
-
-
+@_dispatch
 def subtract(v: Vector, w: Vector) -> Vector:
     "Вычитает соответсвующте элементы"
     assert len(v) == len(w), "векторы должны иметь одинаковую длину"
@@ -20,42 +82,111 @@ def subtract(v: Vector, w: Vector) -> Vector:
     return [v_i - w_i for v_i, w_i in zip(v, w)]
 
 
-assert subtract([5, 7, 9], [4, 5, 6]) == [1, 2, 3]
-
-
-def vector_sum(vectors: List[Vector]) -> Vector:
-    """Суммирует все соответсвующие элементы"""
-    assert vectors, "Векторы не предоставлены!"
-
-    length = len(vectors[0])
-
-    assert all(len(v) == length for v in vectors), "векторы должны иметь одинаковую длину"
-
-    return [sum(vector[i] for vector in vectors)
-            for i in range(length)]
-
-
-assert vector_sum([[1, 2], [3, 4], [5, 6], [7, 8]]) == [16, 20]
-
-
+# Способы суммирования в vector_sum / vector_mean:
+# "simple" - обычное сложение (самое быстрое),
+# "kahan" - компенсированное суммирование Кэхэна (Ноймайера),
+# "pairwise" - попарное суммирование блоков строк
+SUMMATIONS = ('simple', 'kahan', 'pairwise')
+
+_PAIRWISE_BLOCK = 128  # Столько строк складывается обычным образом перед слиянием
+
+
+def _check_length(vector: Vector, length: int) -> None:
+    assert len(vector) == length, "векторы должны иметь одинаковую длину"
+
+
+def _sum_simple(first: Vector, rest: Iterator[Vector]) -> Tuple[Vector, int]:
+    totals = list(first)
+    length, n = len(totals), 1
+    for vector in rest:
+        _check_length(vector, length)
+        totals = list(map(operator.add, totals, vector))
+        n += 1
+    return totals, n
+
+
+def _sum_kahan(first: Vector, rest: Iterator[Vector]) -> Tuple[Vector, int]:
+    totals = list(first)
+    length, n = len(totals), 1
+    compensation = [0.0] * length
+    for vector in rest:
+        _check_length(vector, length)
+        for i, x in enumerate(vector):
+            t = totals[i] + x
+            # Накапливаем потерянные младшие разряды (вариант Ноймайера)
+            if abs(totals[i]) >= abs(x):
+                compensation[i] += (totals[i] - t) + x
+            else:
+                compensation[i] += (x - t) + totals[i]
+            totals[i] = t
+        n += 1
+    return list(map(operator.add, totals, compensation)), n
+
+
+def _sum_pairwise(first: Vector, rest: Iterator[Vector]) -> Tuple[Vector, int]:
+    length = len(first)
+    # Стек частичных сумм (уровень, сумма): как в двоичном счетчике,
+    # суммы одного уровня сливаются, поэтому стек не длиннее log2(n)
+    stack: List[Tuple[int, Vector]] = []
+    block, in_block, n = list(first), 1, 1
+    for vector in rest:
+        _check_length(vector, length)
+        if in_block == _PAIRWISE_BLOCK:
+            level = 0
+            while stack and stack[-1][0] == level:
+                block = list(map(operator.add, stack.pop()[1], block))
+                level += 1
+            stack.append((level, block))
+            block, in_block = list(vector), 0
+        else:
+            block = list(map(operator.add, block, vector))
+        in_block += 1
+        n += 1
+    while stack:
+        block = list(map(operator.add, stack.pop()[1], block))
+    return block, n
+
+
+_SUMMATION_FNS = {'simple': _sum_simple,
+                  'kahan': _sum_kahan,
+                  'pairwise': _sum_pairwise}
+
+
+def _vector_sum_and_count(vectors: Iterable[Vector],
+                          summation: str) -> Tuple[Vector, int]:
+    """Суммирует векторы за один проход по строкам,
+       возвращает (сумму, число векторов)"""
+    if summation not in _SUMMATION_FNS:
+        raise ValueError(f"неизвестный способ суммирования {summation!r}, "
+                         f"допустимые: {SUMMATIONS}")
+    rest = iter(vectors)
+    first = next(rest, None)
+    assert first is not None, "Векторы не предоставлены!"
+    return _SUMMATION_FNS[summation](first, rest)
+
+
+@_dispatch
+def vector_sum(vectors: Iterable[Vector], summation: str = 'simple') -> Vector:
+    """Суммирует все соответсвующие элементы.
+       vectors может быть любым итерируемым объектом, в т. ч. генератором"""
+    totals, _ = _vector_sum_and_count(vectors, summation)
+    return totals
+
+
+@_dispatch
 def scalar_multiply(c: float, v: Vector) -> Vector:
     """Умножает каждый элемент на с"""
     return [c * v_i for v_i in v]
 
 
-assert scalar_multiply(2, [1, 2, 3]) == [2, 4, 6]
-
-
-def vector_mean(vectors: List[Vector]) -> Vector:
-    """Вычисляет поэлементное среднее арифметическое"""
-    n = len(vectors)
-
-    return scalar_multiply(1/n, vector_sum(vectors))
-
-
-assert vector_mean([[1, 2], [3, 4], [5, 6]]) == [3, 4]
+@_dispatch
+def vector_mean(vectors: Iterable[Vector], summation: str = 'simple') -> Vector:
+    """Вычисляет поэлементное среднее арифметическое за один проход"""
+    totals, n = _vector_sum_and_count(vectors, summation)
+    return [total / n for total in totals]
 
 
+@_dispatch
 def dot(v: Vector, w: Vector) -> float:
     """Вычисляет v_i * w_i + ... + v_n * w_n"""
     assert len(v) == len(w), "векторы должны иметь одинаковую длину"
@@ -63,28 +194,21 @@ def dot(v: Vector, w: Vector) -> float:
     return sum(v_i * w_i for v_i, w_i in zip(v, w))
 
 
-assert dot([1, 2, 3], [4, 5, 6]) == 32
-
-
+@_dispatch
 def sum_of_squares(v: Vector) -> float:
     """Возвращает v_1 * v_1 + ... + v_n * v_n"""
     return dot(v, v)
 
 
-assert sum_of_squares([1, 2, 3]) == 14
-
-
 import math
 
 
+@_dispatch
 def magnitude(v: Vector) -> float:
     """Возвращает магнитуду (длину) вектора v"""
     return math.sqrt(sum_of_squares(v))
 
 
-assert magnitude([3, 4]) == 5
-
-
 # Вычисление евклидова расстояния
 # def squared_distance(v: Vector, w: Vector) -> float:
 #     """Вычисляет (v_1 - w_1) ** 2 + ... (v_n - w_n) ** 2"""
@@ -97,6 +221,7 @@ assert magnitude([3, 4]) == 5
 
 
 # эквивалентная функция
+@_dispatch
 def distance(v: Vector, w: Vector) -> float:
     return magnitude(subtract(v, w))
 
@@ -107,6 +232,7 @@ from typing import Tuple
 Matrix = List[List[float]]
 
 
+@_dispatch
 def shape(A: Matrix) -> Tuple[int, int]:
     """Возвращает (число строк А, число столбцов А)"""
     num_rows = len(A)
@@ -114,14 +240,13 @@ def shape(A: Matrix) -> Tuple[int, int]:
     return num_rows, num_cols
 
 
-assert shape([[1, 2, 3], [4, 5, 6]]) == (2, 3)
-
-
+@_dispatch
 def get_row(A: Matrix, i: int) -> Vector:
     """Возвращает i-ю строку А (как тип Vector)"""
     return A[i]
 
 
+@_dispatch
 def get_col(A: Matrix, j: int) -> Vector:
     """Возвращает j-й столбец А (как тип Vector)"""
     return [A_i[j] for A_i in A]
@@ -130,6 +255,7 @@ def get_col(A: Matrix, j: int) -> Vector:
 from typing import Callable
 
 
+@_dispatch
 def make_matrix(num_rows: int,
                 num_cols: int,
                 entry_fn: Callable[[int, int], float]) -> Matrix:
@@ -143,16 +269,11 @@ def make_matrix(num_rows: int,
 
 
 # Единичная матрица
+@_dispatch
 def identity_matrix(n: int) -> Matrix:
     """Возвращает (n x n) - единичную матрицу"""
     return make_matrix(n, n, lambda i, j: 1 if i == j else 0)
 
 
-assert identity_matrix(5) == [[1, 0, 0, 0, 0],
-                              [0, 1, 0, 0, 0],
-                              [0, 0, 1, 0, 0],
-                              [0, 0, 0, 1, 0],
-                              [0, 0, 0, 0, 1]]
-
-
-
+if os.environ.get('DS_BOOK_BACKEND'):
+    set_backend(os.environ['DS_BOOK_BACKEND'])
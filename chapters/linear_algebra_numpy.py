@@ -0,0 +1,161 @@
+# Векторизованная реализация функций chapters.linear_algebra на numpy.
+# Подключается через chapters.linear_algebra.set_backend('numpy').
+# Функции принимают как списки, так и массивы numpy, и возвращают массивы
+# (скалярные результаты - обычные float)
+import itertools
+from typing import Callable, Iterator, Tuple
+
+import numpy as np
+
+from chapters.linear_algebra import Vector, Matrix, SUMMATIONS
+
+
+def _as_array(v) -> np.ndarray:
+    return np.asarray(v, dtype=float)
+
+
+def add(v: Vector, w: Vector) -> Vector:
+    """Складывает соответсвующие элементы"""
+    v, w = _as_array(v), _as_array(w)
+    assert v.shape == w.shape, "векторы должны иметь одинаковую длину"
+    return v + w
+
+
+def subtract(v: Vector, w: Vector) -> Vector:
+    """Вычитает соответсвующие элементы"""
+    v, w = _as_array(v), _as_array(w)
+    assert v.shape == w.shape, "векторы должны иметь одинаковую длину"
+    return v - w
+
+
+_CHUNK_ROWS = 4096  # Строк в одном блоке при потоковом суммировании
+
+
+def _chunks(vectors) -> Iterator[np.ndarray]:
+    """Разбивает vectors на двумерные блоки; массивы и списки - без разбиения"""
+    if isinstance(vectors, (np.ndarray, list, tuple)):
+        yield _as_array(vectors)
+        return
+    rows = iter(vectors)
+    while True:
+        chunk = list(itertools.islice(rows, _CHUNK_ROWS))
+        if not chunk:
+            return
+        yield _as_array(chunk)
+
+
+def _vector_sum_and_count(vectors, summation: str) -> Tuple[np.ndarray, int]:
+    if summation not in SUMMATIONS:
+        raise ValueError(f"неизвестный способ суммирования {summation!r}, "
+                         f"допустимые: {SUMMATIONS}")
+    totals, compensation, n = None, None, 0
+    for chunk in _chunks(vectors):
+        if not chunk.size:
+            continue
+        assert chunk.ndim == 2, "векторы должны иметь одинаковую длину"
+        if summation == 'simple':
+            partial = chunk.sum(axis=0)
+        else:
+            # Сумма по непрерывной оси в numpy выполняется попарно
+            partial = np.ascontiguousarray(chunk.T).sum(axis=1)
+        if totals is None:
+            totals, compensation = partial, np.zeros_like(partial)
+        else:
+            assert totals.shape == partial.shape, "векторы должны иметь одинаковую длину"
+            if summation == 'simple':
+                totals = totals + partial
+            else:
+                # Частичные суммы блоков складываются с компенсацией Ноймайера
+                t = totals + partial
+                compensation += np.where(np.abs(totals) >= np.abs(partial),
+                                         (totals - t) + partial,
+                                         (partial - t) + totals)
+                totals = t
+        n += len(chunk)
+    assert totals is not None, "Векторы не предоставлены!"
+    return totals + compensation, n
+
+
+def vector_sum(vectors, summation: str = 'simple') -> Vector:
+    """Суммирует все соответсвующие элементы"""
+    totals, _ = _vector_sum_and_count(vectors, summation)
+    return totals
+
+
+def scalar_multiply(c: float, v: Vector) -> Vector:
+    """Умножает каждый элемент на с"""
+    return c * _as_array(v)
+
+
+def vector_mean(vectors, summation: str = 'simple') -> Vector:
+    """Вычисляет поэлементное среднее арифметическое"""
+    totals, n = _vector_sum_and_count(vectors, summation)
+    return totals / n
+
+
+def dot(v: Vector, w: Vector) -> float:
+    """Вычисляет v_i * w_i + ... + v_n * w_n"""
+    v, w = _as_array(v), _as_array(w)
+    assert v.shape == w.shape, "векторы должны иметь одинаковую длину"
+    return float(np.dot(v, w))
+
+
+def sum_of_squares(v: Vector) -> float:
+    """Возвращает v_1 * v_1 + ... + v_n * v_n"""
+    v = _as_array(v)
+    return float(np.dot(v, v))
+
+
+def magnitude(v: Vector) -> float:
+    """Возвращает магнитуду (длину) вектора v"""
+    return float(np.linalg.norm(_as_array(v)))
+
+
+def distance(v: Vector, w: Vector) -> float:
+    return magnitude(subtract(v, w))
+
+
+# Матрица может быть массивом numpy или списком списков: список списков
+# не превращается в массив целиком ради одной строки или размера
+def shape(A: Matrix) -> Tuple[int, int]:
+    """Возвращает (число строк А, число столбцов А)"""
+    if isinstance(A, np.ndarray):
+        num_rows = A.shape[0]
+        return num_rows, A.shape[1] if num_rows else 0
+    num_rows = len(A)
+    return num_rows, len(A[0]) if num_rows else 0
+
+
+def get_row(A: Matrix, i: int) -> Vector:
+    """Возвращает i-ю строку А (как тип Vector)"""
+    if isinstance(A, np.ndarray):
+        return _as_array(A)[i]
+    return np.asarray(A[i], dtype=float)
+
+
+def get_col(A: Matrix, j: int) -> Vector:
+    """Возвращает j-й столбец А (как тип Vector)"""
+    if isinstance(A, np.ndarray):
+        return _as_array(A)[:, j]
+    return np.array([A_i[j] for A_i in A], dtype=float)
+
+
+def make_matrix(num_rows: int,
+                num_cols: int,
+                entry_fn: Callable[[int, int], float]) -> Matrix:
+    """
+    Возвращает матрицу размера num_rows х num_cols,
+    чей (i, j)-й элемент является функцией entry_fn(i, j)
+    """
+    # entry_fn - произвольная функция Python, поэтому вызываем ее поэлементно,
+    # но сразу пишем в непрерывный массив без промежуточных списков
+    entries = np.fromiter((entry_fn(i, j)
+                           for i in range(num_rows)
+                           for j in range(num_cols)),
+                          dtype=float, count=num_rows * num_cols)
+    return entries.reshape(num_rows, num_cols)
+
+
+def identity_matrix(n: int) -> Matrix:
+    """Возвращает (n x n) - единичную матрицу"""
+    return np.eye(n)
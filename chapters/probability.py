@@ -1,4 +1,4 @@
-import enum, random
+import enum, functools, random
 
 
 # Enum - это типизированное множество перечислимых значений
@@ -14,26 +14,6 @@ def random_kid() -> Kid:
     return random.choice([Kid.BOY, Kid.GIRL])
 
 
-both_girls = 0
-older_girl = 0
-either_girl = 0
-
-random.seed(0)
-
-for _ in range(1000):
-    younger = random_kid()
-    older = random_kid()
-    if older == Kid.GIRL:
-        older_girl += 1
-    if older == Kid.GIRL and younger == Kid.GIRL:
-        both_girls += 1
-    if older == Kid.GIRL or younger == Kid.GIRL:
-        either_girl += 1
-
-print("P(both | older): ", both_girls / older_girl)  # ~0.49
-print("P(both | either): ", both_girls / either_girl)  # ~0.32
-
-
 # функция плотности равномерного распределения
 def uniform_pdf(x: float) -> float:
     return 1 if 0 <= x < 1 else 0
@@ -51,6 +31,8 @@ def uniform_cdf(x: float) -> float:
 # Нормальное распределение
 import math
 SQRT_TWO_PI = math.sqrt(2 * math.pi)
+SQRT_TWO = math.sqrt(2)
+SQRT_PI = math.sqrt(math.pi)
 
 
 # Функция плотности нормального распределения
@@ -64,27 +46,161 @@ def normal_cdf(x: float, mu: float = 0, sigma: float = 1) -> float:
 
 
 # инвертирование кумулятивной функции normal_cdf
-# чтобы находить значение, соответсвующее указанной вероятности
+# чтобы находить значение, соответсвующее указанной вероятности.
+# Вместо бинарного поиска используется рациональная аппроксимация Акклама
+# (относительная ошибка ~1e-9), уточняемая одним шагом метода Галлея
+_ACKLAM_A = (-3.969683028665376e+01, 2.209460984245205e+02, -2.759285104469687e+02,
+             1.383577518672690e+02, -3.066479806614716e+01, 2.506628277459239e+00)
+_ACKLAM_B = (-5.447609879822406e+01, 1.615858368580409e+02, -1.556989798598866e+02,
+             6.680131188771972e+01, -1.328068155288572e+01)
+_ACKLAM_C = (-7.784894002430293e-03, -3.223964580411365e-01, -2.400758277161838e+00,
+             -2.549732539343734e+00, 4.374664141464968e+00, 2.938163982698783e+00)
+_ACKLAM_D = (7.784695709041462e-03, 3.224671290700398e-01, 2.445134137142996e+00,
+             3.754408661907416e+00)
+_ACKLAM_P_LOW = 0.02425  # Граница между центральной областью и хвостами
+_MAX_EXP_ARG = 700  # exp(709.8) - предел для float
+
+
+def _standard_inverse_normal_cdf(p: float) -> float:
+    """z, для которого normal_cdf(z) = p (для N(0, 1))"""
+    if p <= 0:
+        return -math.inf
+    if p >= 1:
+        return math.inf
+
+    a, b, c, d = _ACKLAM_A, _ACKLAM_B, _ACKLAM_C, _ACKLAM_D
+    if p < _ACKLAM_P_LOW or p > 1 - _ACKLAM_P_LOW:
+        # Хвосты
+        q = math.sqrt(-2 * math.log(p if p < 0.5 else 1 - p))
+        z = ((((((c[0] * q + c[1]) * q + c[2]) * q + c[3]) * q + c[4]) * q + c[5]) /
+             ((((d[0] * q + d[1]) * q + d[2]) * q + d[3]) * q + 1))
+        if p > 0.5:
+            z = -z
+    else:
+        # Центральная область
+        q = p - 0.5
+        r = q * q
+        z = ((((((a[0] * r + a[1]) * r + a[2]) * r + a[3]) * r + a[4]) * r + a[5]) * q /
+             (((((b[0] * r + b[1]) * r + b[2]) * r + b[3]) * r + b[4]) * r + 1))
+
+    # Шаг Галлея доводит точность почти до машинной. В крайних хвостах
+    # (p < ~1e-300) exp(z * z / 2) переполняется - там остается аппроксимация
+    if z * z / 2 > _MAX_EXP_ARG:
+        return z
+    e = math.erfc(-z / SQRT_TWO) / 2 - p
+    u = e * SQRT_TWO_PI * math.exp(z * z / 2)
+    return z - u / (1 + z * u / 2)
+
+
 def inverse_normal_cdf(p: float,
                        mu: float = 0,
                        sigma: float = 1,
-                       tolerance: float = 0.00001) -> float:  # задать точность
-    """Отыскать приближенную инверсию, используя бинарный поиск"""
-    # Если нестандартная, то вычислить стандартную и перешкалировать
-    if mu != 0 or sigma != 1:
-        return mu + sigma * inverse_normal_cdf(p, tolerance=tolerance)
+                       tolerance: float = 0.00001) -> float:
+    """Отыскать приближенную инверсию. tolerance оставлен для совместимости
+       с бинарным поиском: результат точнее любого разумного tolerance"""
+    return mu + sigma * _standard_inverse_normal_cdf(p)
+
+
+# Варианты для целых массивов значений. На чистом Python это цикл по
+# элементам с локальными ссылками на функции; при движке numpy
+# (chapters.linear_algebra.set_backend('numpy')) весь массив обрабатывается
+# векторными операциями, без вызова функций Python на каждый элемент,
+# и результат - массив numpy
+from typing import Iterable, List
+
+from chapters.linear_algebra import get_backend
+
+
+def normal_pdfs(xs: Iterable[float], mu: float = 0, sigma: float = 1) -> List[float]:
+    scale = SQRT_TWO_PI * sigma
+    two_variance = 2 * sigma ** 2
+    if get_backend() == 'numpy':
+        import numpy as np
+        return np.exp(-(np.asarray(xs, dtype=float) - mu) ** 2 / two_variance) / scale
+    exp = math.exp
+    return [exp(-(x - mu) ** 2 / two_variance) / scale for x in xs]
+
+
+def normal_cdfs(xs: Iterable[float], mu: float = 0, sigma: float = 1) -> List[float]:
+    scale = SQRT_TWO * sigma
+    if get_backend() == 'numpy':
+        import numpy as np
+        return erfc_array(-(np.asarray(xs, dtype=float) - mu) / scale) / 2
+    erf = math.erf
+    return [(1 + erf((x - mu) / scale)) / 2 for x in xs]
+
+
+def inverse_normal_cdfs(ps: Iterable[float], mu: float = 0, sigma: float = 1) -> List[float]:
+    if get_backend() == 'numpy':
+        return mu + sigma * _standard_inverse_normal_cdfs_numpy(ps)
+    inverse = _standard_inverse_normal_cdf
+    return [mu + sigma * inverse(p) for p in ps]
+
+
+def _standard_inverse_normal_cdfs_numpy(ps: Iterable[float]):
+    """_standard_inverse_normal_cdf для массива: обе ветви аппроксимации
+       Акклама считаются для всего массива и выбираются через np.where"""
+    import numpy as np
+
+    p = np.asarray(ps, dtype=float)
+    a, b, c, d = _ACKLAM_A, _ACKLAM_B, _ACKLAM_C, _ACKLAM_D
+    with np.errstate(all='ignore'):  # ненужная ветвь может дать inf и nan
+        q = np.sqrt(-2 * np.log(np.minimum(p, 1 - p)))
+        tails = ((((((c[0] * q + c[1]) * q + c[2]) * q + c[3]) * q + c[4]) * q + c[5]) /
+                 ((((d[0] * q + d[1]) * q + d[2]) * q + d[3]) * q + 1))
+        tails = np.where(p > 0.5, -tails, tails)
+
+        q = p - 0.5
+        r = q * q
+        central = ((((((a[0] * r + a[1]) * r + a[2]) * r + a[3]) * r + a[4]) * r + a[5]) * q /
+                   (((((b[0] * r + b[1]) * r + b[2]) * r + b[3]) * r + b[4]) * r + 1))
+        z = np.where((p < _ACKLAM_P_LOW) | (p > 1 - _ACKLAM_P_LOW), tails, central)
+
+        e = erfc_array(-z / SQRT_TWO) / 2 - p
+        u = e * SQRT_TWO_PI * np.exp(z * z / 2)
+        z = np.where(z * z / 2 > _MAX_EXP_ARG, z, z - u / (1 + z * u / 2))
+    return np.where(p <= 0, -np.inf, np.where(p >= 1, np.inf, z))
+
+
+# erfc для массивов numpy (своей erf в numpy нет). Гладкая функция
+# log(erfc(z) * (2 + z) / 2) + z * z от t = 2 / (2 + z) (подстановка из
+# Numerical Recipes, 3-е изд., 6.2.2) приближается многочленом Чебышева
+# на 0 <= z <= 26; коэффициенты строятся один раз по math.erfc.
+# Относительная ошибка ~1e-13. При z > 26 (erfc < 1e-296) - асимптотический ряд
+_ERFC_Z_MAX = 26.0
+_ERFC_T_MIN = 2 / (2 + _ERFC_Z_MAX)
+_ERFC_DEGREE = 30
+_erfc_coefficients = None
+
+
+def _erfc_log_part(x):
+    """Интерполируемая функция в точках x отрезка [-1, 1]"""
+    import numpy as np
+    ts = _ERFC_T_MIN + (1 - _ERFC_T_MIN) * (x + 1) / 2
+    return np.array([math.log(math.erfc(z) * (2 + z) / 2) + z * z for z in 2 / ts - 2])
+
 
-    low_z = -10.0  # normal_cdf(-10) находится близко к 0
-    hi_z = 10.0  # normal_cdf(10) находится близко к 1
+def erfc_array(zs):
+    """math.erfc для каждого элемента массива zs, векторными операциями numpy"""
+    global _erfc_coefficients
+    import numpy as np
+    from numpy.polynomial import chebyshev
 
-    while hi_z - low_z > tolerance:
-        mid_z = (low_z + hi_z) / 2  # Рассмотреть среднюю точку
-        mid_p = normal_cdf(mid_z)  # и значение CDF
-        if mid_p < p:
-            low_z = mid_z  # Средняя точка слишком низкая, искать выше
-        else:
-            hi_z = mid_z  # Средняя точка слишком высокая, искать ниже
-    return mid_z
+    if _erfc_coefficients is None:
+        _erfc_coefficients = chebyshev.chebinterpolate(_erfc_log_part, _ERFC_DEGREE)
+
+    zs = np.asarray(zs, dtype=float)
+    a = np.abs(zs)
+    near = np.minimum(a, _ERFC_Z_MAX)
+    t = 2 / (2 + near)
+    x = 2 * (t - _ERFC_T_MIN) / (1 - _ERFC_T_MIN) - 1
+    result = t * np.exp(chebyshev.chebval(x, _erfc_coefficients) - near * near)
+
+    far = np.maximum(a, _ERFC_Z_MAX)
+    inverse_square = 1 / (far * far)
+    series = 1 + inverse_square * (-1 / 2 + inverse_square * (3 / 4 - inverse_square * 15 / 8))
+    result = np.where(a > _ERFC_Z_MAX, np.exp(-far * far) / (far * SQRT_PI) * series, result)
+    return np.where(zs < 0, 2 - result, result)
 
 
 # Центральная предельная теорема
@@ -98,4 +214,158 @@ def binomial(n: int, p: float) -> int:
     """Возвращает сумму из n испытаний bernoulli(p)"""
     return sum(bernoulli_trial(p) for _ in range(n))
 
+
+# Пакетная симуляция (метод Монте-Карло)
+# Выборки генерируются целыми пакетами из собственного ГСЧ симулятора,
+# а не вызовом функции Python на каждое испытание.
+# При движке numpy (chapters.linear_algebra.set_backend('numpy'))
+# пакеты генерируются векторно и возвращаются массивами numpy
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Optional
+
+_BINOMIAL_INVERSION_MAX_N = 64  # До такого n биномиальная СВ ищется инверсией
+
+
+def worker_seed(seed: int, index: int) -> str:
+    """Детерминированное зерно для index-го пакета/работника:
+       строковые зерна random.Random хэшируются (sha512), поэтому
+       зерна разных работников не пересекаются"""
+    return f"{seed}/{index}"
+
+
+class Sampler:
+    """Генератор пакетов выборок с воспроизводимым зерном.
+       backend - движок ('python' или 'numpy'), по умолчанию текущий"""
+
+    def __init__(self, seed=None, backend: Optional[str] = None) -> None:
+        self.rng = random.Random(seed)
+        self.np_rng = None
+        if (backend or get_backend()) == 'numpy':
+            import numpy as np
+            # зерно numpy выводится из того же ГСЧ, поэтому тоже воспроизводимо
+            self.np_rng = np.random.default_rng(self.rng.getrandbits(128))
+
+    def uniforms(self, size: int) -> List[float]:
+        """size значений из равномерного распределения на [0, 1)"""
+        if self.np_rng is not None:
+            return self.np_rng.random(size)
+        rand = self.rng.random
+        return [rand() for _ in range(size)]
+
+    def normals(self, size: int, mu: float = 0, sigma: float = 1) -> List[float]:
+        """size значений из N(mu, sigma)"""
+        if self.np_rng is not None:
+            return self.np_rng.normal(mu, sigma, size)
+        gauss = self.rng.gauss
+        return [gauss(mu, sigma) for _ in range(size)]
+
+    def bernoullis(self, size: int, p: float) -> List[int]:
+        """size испытаний Бернулли: 1 с вероятностью p"""
+        if self.np_rng is not None:
+            return (self.np_rng.random(size) < p).astype(int)
+        rand = self.rng.random
+        return [1 if rand() < p else 0 for _ in range(size)]
+
+    def coin_flips(self, size: int) -> int:
+        """size честных бросков монеты одним целым числом: i-й бит - i-й бросок"""
+        return self.rng.getrandbits(size) if size else 0
+
+    def binomial(self, n: int, p: float) -> int:
+        """Число успехов в n испытаниях bernoulli(p) без
+           генерации самих испытаний (алгоритм Кнута через бета-распределение)"""
+        rng = self.rng
+        successes = 0
+        # Делим испытания пополам порядковой статистикой равномерных величин:
+        # O(log n) бета-величин вместо n равномерных
+        while n > _BINOMIAL_INVERSION_MAX_N:
+            a = 1 + n // 2
+            b = n + 1 - a
+            x = rng.betavariate(a, b)
+            if x >= p:
+                n, p = a - 1, p / x
+            else:
+                successes += a
+                n, p = b - 1, (p - x) / (1 - x)
+        return successes + self._binomial_inversion(n, p)
+
+    def _binomial_inversion(self, n: int, p: float) -> int:
+        """Инверсия функции распределения для малых n"""
+        if p > 0.5:
+            return n - self._binomial_inversion(n, 1 - p)
+        if n == 0 or p <= 0:
+            return 0
+        q = 1 - p
+        s = p / q
+        a = (n + 1) * s
+        r = q ** n           # P(X = 0)
+        u = self.rng.random()
+        x = 0
+        while u > r and x < n:
+            u -= r
+            x += 1
+            r *= a / x - s   # P(X = x) из P(X = x - 1)
+        return x
+
+    def binomials(self, size: int, n: int, p: float) -> List[int]:
+        """size значений binomial(n, p)"""
+        if self.np_rng is not None:
+            return self.np_rng.binomial(n, p, size)
+        return [self.binomial(n, p) for _ in range(size)]
+
+
+def simulate(trials_fn: Callable[[Sampler, int], Counter],
+             num_trials: int,
+             seed: int = 0,
+             chunk_size: int = 100_000,
+             processes: Optional[int] = None) -> Counter:
+    """Выполняет num_trials испытаний пакетами по chunk_size.
+       trials_fn(sampler, n) проводит n испытаний и возвращает Counter исходов.
+       Пакет i всегда получает зерно worker_seed(seed, i), а счетчики
+       складываются по порядку пакетов, поэтому результат не зависит
+       от числа процессов (processes > 1 - пул процессов;
+       trials_fn должна быть функцией уровня модуля). Движок выборок
+       фиксируется при вызове и передается работникам явно: при запуске
+       процессов через spawn они не наследуют set_backend"""
+    sizes = [min(chunk_size, num_trials - start)
+             for start in range(0, num_trials, chunk_size)]
+    seeds = [worker_seed(seed, i) for i in range(len(sizes))]
+    fns = [trials_fn] * len(sizes)
+    backends = [get_backend()] * len(sizes)
+
+    if processes is not None and processes > 1:
+        with ProcessPoolExecutor(processes) as pool:
+            counts = list(pool.map(_run_trials, fns, seeds, sizes, backends))
+    else:
+        counts = list(map(_run_trials, fns, seeds, sizes, backends))
+
+    total = Counter()
+    for chunk_counts in counts:
+        total.update(chunk_counts)
+    return total
+
+
+def _run_trials(trials_fn: Callable[[Sampler, int], Counter], seed: str, size: int,
+                backend: str) -> Counter:
+    return trials_fn(Sampler(seed, backend), size)
+
+
+def kid_trials(sampler: Sampler, n: int) -> Counter:
+    """n семей с двумя детьми для парадокса мальчика и девочки:
+       бит 1 - девочка, пол всех детей генерируется одним числом"""
+    younger = sampler.coin_flips(n)
+    older = sampler.coin_flips(n)
+    return Counter(older_girl=older.bit_count(),
+                   both_girls=(older & younger).bit_count(),
+                   either_girl=(older | younger).bit_count())
+
+
+def binomial_trials(n: int, p: float) -> Callable[[Sampler, int], Counter]:
+    """Функция испытаний для simulate: гистограмма значений binomial(n, p)"""
+    return functools.partial(_binomial_trials, n, p)
+
+
+def _binomial_trials(n: int, p: float, sampler: Sampler, size: int) -> Counter:
+    return Counter(int(k) for k in sampler.binomials(size, n, p))
+
 # продолжение в probability.ipynb
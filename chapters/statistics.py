@@ -1,58 +1,136 @@
 from collections import Counter
-from typing import List
+from typing import Dict, Iterable, List
 
 Vector = List[float]
 
-num_friends = [100, 49, 41, 40, 25, 21, 21, 19, 19, 18, 18, 16, 15, 15, 15, 15, 14, 14, 13, 13, 13, 13, 12, 12, 11,
-               10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 9, 9, 9, 9, 9, 9, 9, 9, 9, 9, 9, 9, 9, 9, 9,
-               9, 9, 9, 8, 8, 8, 8, 8, 8, 8, 8, 8, 8, 8, 8, 8, 7, 7, 7, 7, 7, 7, 7, 7, 7, 7, 7, 7, 7, 7, 7, 6, 6, 6, 6,
-               6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 5, 5, 5, 5, 5, 5, 5, 5, 5, 5, 5, 5, 5, 5, 5, 5, 5,
-               4, 4, 4, 4, 4, 4, 4, 4, 4, 4, 4, 4, 4, 4, 4, 4, 4, 4, 4, 4, 3, 3, 3, 3, 3, 3, 3, 3, 3, 3, 3, 3, 3, 3, 3,
-               3, 3, 3, 3, 3, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1,
-               1, 1, 1, 1, 1, 1, 1, 1, 1]
-
 
 # Среднее значение
 def mean(xs: List[float]) -> float:
     return sum(xs) / len(xs)
 
 
-def _median_odd(xs: List[float]) -> float:
-    """Если len(xs) является нечетной,
-       то медиана - средний элемент"""
-    return sorted(xs)[len(xs) // 2]
+# Порядковые статистики находятся выбором (quickselect), а не полной сортировкой:
+# ожидаемое время O(n). Если разбиения вырождаются, после предела глубины
+# выбор переходит на сортировку (introselect), так что худший случай - O(n log n).
+# До _SELECT_MIN_SIZE элементов sorted() на C быстрее разбиений на Python,
+# а уже упорядоченные данные (частый случай - цены по датам) не разбиваются вовсе
+import operator
 
+_SELECT_SMALL = 16  # Такие короткие куски проще отсортировать
+_SELECT_MIN_SIZE = 20_000  # Меньшие списки просто сортируются
 
-def _median_even(xs: List[float]) -> float:
-    """Если len(xs) является четной, то она является средним значением
-       двух средних значений"""
-    sorted_xs = sorted(xs)
-    hi_midpoint = len(xs) // 2
-    return (sorted_xs[hi_midpoint - 1] + sorted_xs[hi_midpoint]) / 2
 
+_PRESORTED_PROBE = 64  # Столько первых пар проверяется на упорядоченность
 
-def median(v: List[float]) -> float:
-    """Отыскивает 'ближайшее к середине' значение v"""
-    return _median_even(v) if len(v) % 2 == 0 else _median_odd(v)
 
+def _looks_presorted(xs: List[float]) -> bool:
+    """Упорядочено ли начало xs (по возрастанию или убыванию). У случайных
+       данных 64 упорядоченных пары подряд практически невозможны, а почти
+       упорядоченные данные timsort сортирует за время, близкое к линейному"""
+    head = xs[:_PRESORTED_PROBE + 1]
+    return (all(map(operator.le, head, head[1:])) or
+            all(map(operator.ge, head, head[1:])))
 
-assert median([1, 10, 2, 9, 5]) == 5
-assert median([1, 9, 2, 10]) == (2 + 9) / 2
 
-print(median(num_friends))
+def _order_statistics(xs: List[float], ks: Iterable[int]) -> Dict[int, float]:
+    """Возвращает {k: k-й по величине элемент xs (с нуля)} для всех k из ks,
+       разбивая данные один раз для всех запрошенных k сразу"""
+    n = len(xs)
+    wanted = sorted(set(ks))
+    for k in wanted:
+        if not 0 <= k < n:
+            raise IndexError(f"порядковая статистика {k} вне диапазона [0, {n})")
+
+    if n < _SELECT_MIN_SIZE or _looks_presorted(xs):
+        sorted_xs = sorted(xs)
+        return {k: sorted_xs[k] for k in wanted}
+
+    result: Dict[int, float] = {}
+    depth_limit = 2 * max(n, 1).bit_length()
+    # (значения, смещение их ранга в xs, нужные ранги, оставшаяся глубина)
+    stack = [(xs, 0, wanted, depth_limit)] if wanted else []
+    while stack:
+        values, offset, ks_here, depth = stack.pop()
+        if len(values) <= _SELECT_SMALL or depth == 0:
+            sorted_values = sorted(values)
+            for k in ks_here:
+                result[k] = sorted_values[k - offset]
+            continue
+
+        # Медиана трех как опорный элемент
+        pivot = sorted([values[0], values[len(values) // 2], values[-1]])[1]
+        lows = [x for x in values if x < pivot]
+        highs = [x for x in values if x > pivot]
+        lo_end = offset + len(lows)                      # первый ранг, равный pivot
+        hi_start = offset + len(values) - len(highs)     # первый ранг больше pivot
+
+        ks_low = [k for k in ks_here if k < lo_end]
+        ks_high = [k for k in ks_here if k >= hi_start]
+        for k in ks_here:
+            if lo_end <= k < hi_start:
+                result[k] = pivot
+        if ks_low:
+            stack.append((lows, offset, ks_low, depth - 1))
+        if ks_high:
+            stack.append((highs, hi_start, ks_high, depth - 1))
+
+    return result
+
+
+def median(v: List[float]) -> float:
+    """Отыскивает 'ближайшее к середине' значение v"""
+    n = len(v)
+    if n % 2 == 1:
+        # Если len(v) является нечетной, то медиана - средний элемент
+        return _order_statistics(v, [n // 2])[n // 2]
+
+    # Если len(v) является четной, то она является средним значением
+    # двух средних значений
+    hi_midpoint = n // 2
+    stats = _order_statistics(v, [hi_midpoint - 1, hi_midpoint])
+    return (stats[hi_midpoint - 1] + stats[hi_midpoint]) / 2
 
 
 # Квантиль - значение, ниже которого располагается определенный процентиль данных
 def quantile(xs: List[float], p: float) -> float:
     """Возвращает значение p-го процентиля xs"""
     p_index = int(p * len(xs))
-    return sorted(xs)[p_index]
+    return _order_statistics(xs, [p_index])[p_index]
+
+
+def quantiles(xs: List[float], ps: List[float]) -> List[float]:
+    """Возвращает значения процентилей ps (в том же порядке)
+       за один общий проход разбиения"""
+    p_indices = [int(p * len(xs)) for p in ps]
+    stats = _order_statistics(xs, p_indices)
+    return [stats[p_index] for p_index in p_indices]
+
+
+class SortedView:
+    """Один раз отсортированная копия данных для многократных
+       запросов медианы и квантилей к одним и тем же данным"""
+
+    def __init__(self, xs: Iterable[float]) -> None:
+        self.sorted_xs = sorted(xs)
+
+    def __len__(self) -> int:
+        return len(self.sorted_xs)
+
+    def median(self) -> float:
+        n = len(self.sorted_xs)
+        hi_midpoint = n // 2
+        if n % 2 == 1:
+            return self.sorted_xs[hi_midpoint]
+        return (self.sorted_xs[hi_midpoint - 1] + self.sorted_xs[hi_midpoint]) / 2
+
+    def quantile(self, p: float) -> float:
+        return self.sorted_xs[int(p * len(self.sorted_xs))]
 
+    def quantiles(self, ps: List[float]) -> List[float]:
+        return [self.quantile(p) for p in ps]
 
-assert quantile(num_friends, 0.10) == 1
-assert quantile(num_friends, 0.25) == 3
-assert quantile(num_friends, 0.75) == 9
-assert quantile(num_friends, 0.90) == 13
+    def interquartile_range(self) -> float:
+        return self.quantile(0.75) - self.quantile(0.25)
 
 
 def mode(x: List[float]) -> List[float]:
@@ -63,15 +141,10 @@ def mode(x: List[float]) -> List[float]:
             if count == max_count]
 
 
-assert set(mode(num_friends)) == {1, 6}
-
-
 def data_range(xs: List[float]) -> float:
     return max(xs) - min(xs)
 
 
-assert data_range(num_friends) == 99
-
 from chapters.linear_algebra import sum_of_squares
 
 
@@ -91,8 +164,6 @@ def variance(xs: List[float]) -> float:
     return sum_of_squares(deviations) / (n - 1)
 
 
-assert 81.54 < variance(num_friends) < 81.55
-
 import math
 
 
@@ -101,46 +172,21 @@ def standard_deviation(xs: List[float]) -> float:
     return math.sqrt(variance(xs))
 
 
-assert 9.02 < standard_deviation(num_friends) < 9.043
-
-
 # Чтобы избавиться от чувствительности к выбросам вычисляют ИНТЕРКВАРТИЛЬНЫЙ РАЗМАХ
 def interquartile_range(xs: List[float]) -> float:
     """Возвращает разницу между 75%-ным и 25%-ным квартилями"""
-    return quantile(xs, 0.75) - quantile(xs, 0.25)
+    q1, q3 = quantiles(xs, [0.25, 0.75])
+    return q3 - q1
 
 
-assert interquartile_range(num_friends) == 6
-
 from chapters.linear_algebra import dot
 
-daily_minutes = [1, 68.77, 51.25, 52.08, 38.36, 44.54, 57.13, 51.4, 41.42, 31.22, 34.76, 54.01, 38.79, 47.59, 49.1,
-                 27.66, 41.03, 36.73, 48.65, 28.12, 46.62, 35.57, 32.98, 35, 26.07, 23.77, 39.73, 40.57, 31.65, 31.21,
-                 36.32, 20.45, 21.93, 26.02, 27.34, 23.49, 46.94, 30.5, 33.8, 24.23, 21.4, 27.94, 32.24, 40.57, 25.07,
-                 19.42, 22.39, 18.42, 46.96, 23.72, 26.41, 26.97, 36.76, 40.32, 35.02, 29.47, 30.2, 31, 38.11, 38.18,
-                 36.31, 21.03, 30.86, 36.07, 28.66, 29.08, 37.28, 15.28, 24.17, 22.31, 30.17, 25.53, 19.85, 35.37, 44.6,
-                 17.23, 13.47, 26.33, 35.02, 32.09, 24.81, 19.33, 28.77, 24.26, 31.98, 25.73, 24.86, 16.28, 34.51,
-                 15.23, 39.72, 40.8, 26.06, 35.76, 34.76, 16.13, 44.04, 18.03, 19.65, 32.62, 35.59, 39.43, 14.18, 35.24,
-                 40.13, 41.82, 35.45, 36.07, 43.67, 24.61, 20.9, 21.9, 18.79, 27.61, 27.21, 26.61, 29.77, 20.59, 27.53,
-                 13.82, 33.2, 25, 33.1, 36.65, 18.63, 14.87, 22.2, 36.81, 25.53, 24.62, 26.25, 18.21, 28.08, 19.42,
-                 29.79, 32.8, 35.99, 28.32, 27.79, 35.88, 29.06, 36.28, 14.1, 36.63, 37.49, 26.9, 18.58, 38.48, 24.48,
-                 18.95, 33.55, 14.24, 29.04, 32.51, 25.63, 22.22, 19, 32.73, 15.16, 13.9, 27.2, 32.01, 29.27, 33, 13.74,
-                 20.42, 27.32, 18.23, 35.35, 28.48, 9.08, 24.62, 20.12, 35.26, 19.92, 31.02, 16.49, 12.16, 30.7, 31.22,
-                 34.65, 13.13, 27.51, 33.2, 31.57, 14.1, 33.42, 17.44, 10.12, 24.42, 9.82, 23.39, 30.93, 15.03, 21.67,
-                 31.09, 33.29, 22.61, 26.89, 23.48, 8.38, 27.81, 32.35, 23.84]
-
-daily_hours = [dm / 60 for dm in daily_minutes]
-
 
 def covariance(xs: List[float], ys: List[float]) -> float:
     assert len(xs) == len(ys), "xs и ys должны иметь одинаковое число элементов"
     return dot(de_mean(xs), de_mean(ys)) / (len(xs) - 1)
 
 
-assert 22.42 < covariance(num_friends, daily_minutes) < 22.43
-assert 22.42 / 60 < covariance(num_friends, daily_hours) < 22.43 / 60
-
-
 def correlation(xs: List[float], ys: List[float]) -> float:
     """Измеряет степень, с которой xs и ys варьируются
        в тандеме вокруг своих средних"""
@@ -152,18 +198,129 @@ def correlation(xs: List[float], ys: List[float]) -> float:
         return 0  # если вариации нет
 
 
-assert 0.24 < correlation(num_friends, daily_minutes) < 0.25
-assert 0.24 < correlation(num_friends, daily_hours) < 0.25
-
-
-# См. statistics.ipynb
-
-# отфильтруем выброс
-outlier = num_friends.index(100)  # Индекс выброса
-
-num_friends_good = [x for i, x in enumerate(num_friends) if i != outlier]
-daily_minutes_good = [x for i, x in enumerate(daily_minutes) if i != outlier]
-daily_hours_good = [dm / 60 for dm in daily_minutes_good]
-
-assert 0.57 < correlation(num_friends_good, daily_minutes_good) < 0.58
-assert 0.57 < correlation(num_friends_good, daily_hours_good) < 0.58
+# Потоковые (онлайн) статистики
+# Значения поступают по одному или блоками, в памяти хранятся лишь несколько чисел.
+# Накопители разных частей данных можно объединять (формула Чана и др.),
+# результат совпадает с mean/variance/covariance/correlation над всеми данными.
+# extend читает итерируемое блоками по _RUNNING_CHUNK значений, поэтому
+# генератор по файлу больше оперативной памяти в память целиком не попадает
+import itertools
+
+_RUNNING_CHUNK = 4096
+_MISSING = object()  # Заполнитель для проверки длины xs и ys
+
+
+def _chunks(values: Iterable, size: int = _RUNNING_CHUNK) -> Iterable[list]:
+    it = iter(values)
+    return iter(lambda: list(itertools.islice(it, size)), [])
+
+
+class RunningStats:
+    """Среднее и дисперсия по алгоритму Уэлфорда"""
+
+    def __init__(self, xs: Iterable[float] = ()) -> None:
+        self.n = 0
+        self._mean = 0.0
+        self._m2 = 0.0  # Сумма квадратов отклонений от среднего
+        self.extend(xs)
+
+    def push(self, x: float) -> None:
+        """Добавляет одно значение"""
+        self.n += 1
+        delta = x - self._mean
+        self._mean += delta / self.n
+        self._m2 += delta * (x - self._mean)
+
+    def extend(self, xs: Iterable[float]) -> None:
+        """Добавляет значения: статистики каждого блока считаются
+           отдельно и затем объединяются с накопленными"""
+        for block in _chunks(xs):
+            block_mean = mean(block)
+            chunk = RunningStats()
+            chunk.n, chunk._mean = len(block), block_mean
+            chunk._m2 = sum((x - block_mean) ** 2 for x in block)
+            self.merge(chunk)
+
+    def merge(self, other: 'RunningStats') -> 'RunningStats':
+        """Добавляет статистики другой части данных (на месте)"""
+        if other.n:
+            n = self.n + other.n
+            delta = other._mean - self._mean
+            self._m2 += other._m2 + delta ** 2 * self.n * other.n / n
+            self._mean += delta * other.n / n
+            self.n = n
+        return self
+
+    @property
+    def mean(self) -> float:
+        assert self.n, "среднее требует наличия хотя бы одного элемента"
+        return self._mean
+
+    @property
+    def variance(self) -> float:
+        assert self.n >= 2, "дисперсия требует наличия не менее двух элементов"
+        return self._m2 / (self.n - 1)
+
+    @property
+    def standard_deviation(self) -> float:
+        return math.sqrt(self.variance)
+
+
+class RunningCovariance:
+    """Ковариация и корреляция пар (x, y) за один проход"""
+
+    def __init__(self,
+                 xs: Iterable[float] = (),
+                 ys: Iterable[float] = ()) -> None:
+        self.x = RunningStats()
+        self.y = RunningStats()
+        self._c = 0.0  # Сумма произведений отклонений от средних
+        self.extend(xs, ys)
+
+    @property
+    def n(self) -> int:
+        return self.x.n
+
+    def push(self, x: float, y: float) -> None:
+        """Добавляет одну пару значений"""
+        dx = x - self.x._mean  # отклонение от старого среднего x
+        self.x.push(x)
+        self.y.push(y)
+        self._c += dx * (y - self.y._mean)  # и от нового среднего y
+
+    def extend(self, xs: Iterable[float], ys: Iterable[float]) -> None:
+        """Добавляет пары значений (блоками)"""
+        for block in _chunks(itertools.zip_longest(xs, ys, fillvalue=_MISSING)):
+            block_xs, block_ys = zip(*block)
+            assert _MISSING not in block_xs and _MISSING not in block_ys, \
+                "xs и ys должны иметь одинаковое число элементов"
+            chunk = RunningCovariance()
+            chunk.x.extend(block_xs)
+            chunk.y.extend(block_ys)
+            chunk._c = dot(de_mean(block_xs), de_mean(block_ys))
+            self.merge(chunk)
+
+    def merge(self, other: 'RunningCovariance') -> 'RunningCovariance':
+        """Добавляет статистики другой части данных (на месте)"""
+        if other.n:
+            n = self.n + other.n
+            dx = other.x._mean - self.x._mean
+            dy = other.y._mean - self.y._mean
+            self._c += other._c + dx * dy * self.n * other.n / n
+            self.x.merge(other.x)
+            self.y.merge(other.y)
+        return self
+
+    @property
+    def covariance(self) -> float:
+        assert self.n >= 2, "ковариация требует наличия не менее двух элементов"
+        return self._c / (self.n - 1)
+
+    @property
+    def correlation(self) -> float:
+        stdev_x = self.x.standard_deviation
+        stdev_y = self.y.standard_deviation
+        if stdev_x > 0 and stdev_y > 0:
+            return self.covariance / stdev_x / stdev_y
+        else:
+            return 0  # если вариации нет
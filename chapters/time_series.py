@@ -0,0 +1,150 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import datetime
+import heapq
+import math
+
+from chapters.linear_algebra import get_backend
+from chapters.work_with_data import DailyChange, PriceTable
+
+
+# Временные ряды цен одной акции (упорядоченных по дате).
+# Все скользящие статистики считаются за O(n) независимо от длины окна:
+# среднее и дисперсия обновляются при сдвиге окна, максимум и минимум -
+# через монотонную очередь. Результат скользящей функции имеет длину
+# len(xs) - window + 1: i-й элемент относится к окну xs[i:i + window]
+
+def pct_changes(prices: Sequence[float]) -> List[float]:
+    """Изменения день ко дню: prices[i] / prices[i - 1] - 1"""
+    if get_backend() == 'numpy':
+        import numpy as np
+        prices = np.asarray(prices, dtype=float)
+        return (prices[1:] / prices[:-1] - 1).tolist()
+    it = iter(prices)
+    yesterday = next(it, None)
+    changes = []
+    for today in it:
+        changes.append(today / yesterday - 1)
+        yesterday = today
+    return changes
+
+
+def log_returns(prices: Sequence[float]) -> List[float]:
+    """Логарифмические доходности: log(prices[i] / prices[i - 1])"""
+    if get_backend() == 'numpy':
+        import numpy as np
+        return np.diff(np.log(np.asarray(prices, dtype=float))).tolist()
+    logs = [math.log(price) for price in prices]
+    return [today - yesterday for yesterday, today in zip(logs, logs[1:])]
+
+
+def _check_window(window: int) -> None:
+    assert window >= 1, "окно должно содержать хотя бы один элемент"
+
+
+def rolling_mean(xs: Sequence[float], window: int) -> List[float]:
+    """Скользящее среднее через накопленную сумму окна"""
+    _check_window(window)
+    if len(xs) < window:
+        return []
+    if get_backend() == 'numpy':
+        import numpy as np
+        sums = np.cumsum(np.concatenate(([0.0], np.asarray(xs, dtype=float))))
+        return ((sums[window:] - sums[:-window]) / window).tolist()
+    total = math.fsum(xs[:window])
+    means = [total / window]
+    for old, new in zip(xs, xs[window:]):
+        total += new - old
+        means.append(total / window)
+    return means
+
+
+def rolling_std(xs: Sequence[float], window: int) -> List[float]:
+    """Скользящее (выборочное) стандартное отклонение: среднее и сумма
+       квадратов отклонений окна обновляются при замене old на new"""
+    _check_window(window)
+    assert window >= 2, "дисперсия требует наличия не менее двух элементов"
+    if len(xs) < window:
+        return []
+    mean = sum(xs[:window]) / window
+    m2 = sum((x - mean) ** 2 for x in xs[:window])
+    stdevs = [math.sqrt(m2 / (window - 1))]
+    for old, new in zip(xs, xs[window:]):
+        new_mean = mean + (new - old) / window
+        m2 += (new - old) * (new - new_mean + old - mean)
+        mean = new_mean
+        stdevs.append(math.sqrt(max(m2, 0.0) / (window - 1)))
+    return stdevs
+
+
+def _rolling_extreme(xs: Sequence[float], window: int,
+                     better: Callable[[float, float], bool]) -> List[float]:
+    """Монотонная очередь индексов: значения в ней упорядочены так, что
+       лучший элемент окна всегда в начале; каждый индекс входит и выходит
+       из очереди один раз"""
+    _check_window(window)
+    candidates: deque = deque()
+    result = []
+    for i, x in enumerate(xs):
+        while candidates and not better(xs[candidates[-1]], x):
+            candidates.pop()
+        candidates.append(i)
+        if candidates[0] <= i - window:
+            candidates.popleft()
+        if i >= window - 1:
+            result.append(xs[candidates[0]])
+    return result
+
+
+def rolling_max(xs: Sequence[float], window: int) -> List[float]:
+    return _rolling_extreme(xs, window, lambda kept, new: kept > new)
+
+
+def rolling_min(xs: Sequence[float], window: int) -> List[float]:
+    return _rolling_extreme(xs, window, lambda kept, new: kept < new)
+
+
+def top_movers(changes: Iterable[DailyChange], k: int = 10) -> Tuple[List[DailyChange], List[DailyChange]]:
+    """k наибольших ростов и k наибольших падений (куча, без полной сортировки)"""
+    changes = list(changes)
+    key = lambda change: change.pct_change
+    return heapq.nlargest(k, changes, key=key), heapq.nsmallest(k, changes, key=key)
+
+
+# Расчеты по всем акциям таблицы PriceTable.
+# Цены каждой акции лежат в таблице подряд, поэтому функция получает
+# срез массива цен; processes > 1 распределяет акции по пулу процессов
+# (fn должна быть функцией уровня модуля)
+def per_symbol(table: PriceTable,
+               fn: Callable[..., List[float]],
+               *args,
+               processes: Optional[int] = None) -> Dict[str, List[float]]:
+    """{символ: fn(цены символа, *args)} для всех акций таблицы"""
+    prices = table.closing_prices
+    series = [prices[table.starts[code]:table.starts[code + 1]]
+              for code in range(len(table.symbols))]
+    extra = [[arg] * len(series) for arg in args]
+
+    if processes is not None and processes > 1:
+        with ProcessPoolExecutor(processes) as pool:
+            results = list(pool.map(fn, series, *extra))
+    else:
+        results = list(map(fn, series, *extra))
+    return dict(zip(table.symbols, results))
+
+
+def table_top_movers(table: PriceTable, k: int = 10) -> Tuple[List[DailyChange], List[DailyChange]]:
+    """top_movers по всем акциям таблицы: куча работает по столбцу изменений,
+       объекты DailyChange создаются только для 2k результатов"""
+    codes, dates, changes = table.pct_changes()
+    indices = range(len(changes))
+    largest = heapq.nlargest(k, indices, key=changes.__getitem__)
+    smallest = heapq.nsmallest(k, indices, key=changes.__getitem__)
+
+    def daily_change(i: int) -> DailyChange:
+        return DailyChange(table.symbols[codes[i]],
+                           datetime.date.fromordinal(dates[i]),
+                           changes[i])
+
+    return [daily_change(i) for i in largest], [daily_change(i) for i in smallest]
@@ -1,8 +1,12 @@
 import random
-from typing import List, Dict
-from collections import Counter
+from typing import Callable, List, Dict, Iterable, Iterator, Optional, Tuple
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+import bisect
+import json
 import math
-import matplotlib.pyplot as plt
+
+from chapters.linear_algebra import get_backend
 
 
 def bucketsize(point: float, bucket_size: float) -> float:
@@ -14,51 +18,251 @@ def bucketsize(point: float, bucket_size: float) -> float:
 def make_histogram(points: List[float], bucket_size: float) -> Dict[float, int]:
     """Разбивает точки на интервалы и подсчитывает
         их количество в каждом интервале"""
-    return Counter(bucketsize(point, bucket_size) for point in points)
+    return Counter(Histogram(bucket_size).update(points).as_dict())
+
 
+def plot_histogram(points, bucket_size: Optional[float] = None, title: str=''):
+    """points - список точек или уже посчитанная гистограмма Histogram
+       (например, загруженная из файла): тогда сырые точки не нужны"""
+    import matplotlib.pyplot as plt  # тяжелый импорт - только при построении графика
 
-def plot_histogram(points: List[float], bucket_size: float, title: str=''):
-    histogram = make_histogram(points, bucket_size)
-    plt.bar(list(histogram.keys()),
-            list(histogram.values()),
-            width=bucket_size)
+    histogram = points if isinstance(points, Histogram) else Histogram(bucket_size).update(points)
+    lefts, widths, counts = zip(*histogram.bars()) if histogram.counts else ((), (), ())
+    plt.bar(lefts, counts, width=widths, align='edge')
     plt.title(title)
     plt.show()
 
 
-from chapters.linear_algebra import Matrix, Vector, make_matrix
-from chapters.statistics import correlation
+# Гистограмма как накапливаемая сводка.
+# Интервалы либо одинаковой ширины bucket_size (интервал k - это
+# [k * bucket_size, (k + 1) * bucket_size)), либо заданы границами edges
+# (интервал i - [edges[i], edges[i + 1]), например по квантилям выборки).
+# Точки добавляются пакетами (update), номера интервалов считаются для всего
+# пакета сразу; гистограммы, посчитанные по частям (в том числе в разных
+# процессах), складываются merge. Сводка хранит только счетчики интервалов
+class Histogram:
+    def __init__(self,
+                 bucket_size: Optional[float] = None,
+                 edges: Optional[List[float]] = None) -> None:
+        assert (bucket_size is None) != (edges is None), "нужен либо bucket_size, либо edges"
+        assert edges is None or len(edges) >= 2, "нужны хотя бы две границы"
+        self.bucket_size = bucket_size
+        self.edges = list(edges) if edges is not None else None
+        # номер интервала -> число точек; при edges номера -1 и len(edges) - 1
+        # считают точки левее первой и не левее последней границы
+        self.counts: Counter = Counter()
+
+    @classmethod
+    def from_quantiles(cls, sample: List[float], num_buckets: int) -> 'Histogram':
+        """Интервалы с примерно равным числом точек выборки sample"""
+        from chapters.statistics import quantiles
+
+        edges = quantiles(sample, [i / num_buckets for i in range(num_buckets)])
+        edges.append(math.nextafter(max(sample), math.inf))  # максимум попадает в последний
+        return cls(edges=edges)
+
+    def _bucket_indices(self, points: List[float]) -> Counter:
+        if get_backend() == 'numpy':
+            import numpy as np
+            points = np.asarray(points, dtype=float)
+            if self.edges is None:
+                indices = np.floor(points / self.bucket_size).astype(np.int64)
+            else:
+                indices = np.searchsorted(self.edges, points, side='right') - 1
+            values, counts = np.unique(indices, return_counts=True)
+            return Counter(dict(zip(values.tolist(), counts.tolist())))
+        if self.edges is None:
+            return Counter(map(math.floor, [point / self.bucket_size for point in points]))
+        edges = self.edges
+        return Counter(bisect.bisect_right(edges, point) - 1 for point in points)
+
+    def update(self, points: List[float]) -> 'Histogram':
+        """Добавляет пакет точек"""
+        self.counts.update(self._bucket_indices(points))
+        return self
+
+    def merge(self, other: 'Histogram') -> 'Histogram':
+        """Добавляет счетчики другой гистограммы с теми же интервалами"""
+        assert (self.bucket_size, self.edges) == (other.bucket_size, other.edges), \
+            "интервалы гистограмм должны совпадать"
+        self.counts.update(other.counts)
+        return self
+
+    def __len__(self) -> int:
+        """Общее число точек"""
+        return sum(self.counts.values())
+
+    def bucket(self, index: int) -> Tuple[float, float]:
+        """Границы интервала с номером index (хвосты - до бесконечности)"""
+        if self.edges is None:
+            return index * self.bucket_size, (index + 1) * self.bucket_size
+        left = self.edges[index] if index >= 0 else -math.inf
+        right = self.edges[index + 1] if index + 1 < len(self.edges) else math.inf
+        return left, right
+
+    def as_dict(self) -> Dict[float, int]:
+        """{левая граница интервала: число точек}, как make_histogram"""
+        return {self.bucket(index)[0]: count for index, count in sorted(self.counts.items())}
+
+    def bars(self) -> List[Tuple[float, float, int]]:
+        """(левая граница, ширина, число точек) конечных интервалов по порядку"""
+        bars = []
+        for index, count in sorted(self.counts.items()):
+            left, right = self.bucket(index)
+            if math.isfinite(left) and math.isfinite(right):
+                bars.append((left, right - left, count))
+        return bars
+
+    def to_dict(self) -> dict:
+        """Компактная сводка: интервалы и пары (номер, счетчик) непустых интервалов"""
+        return {'bucket_size': self.bucket_size,
+                'edges': self.edges,
+                'counts': sorted(self.counts.items())}
+
+    @classmethod
+    def from_dict(cls, summary: dict) -> 'Histogram':
+        histogram = cls(summary['bucket_size'], summary['edges'])
+        histogram.counts.update(dict((index, count) for index, count in summary['counts']))
+        return histogram
+
+    def save(self, path: str) -> None:
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path: str) -> 'Histogram':
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+
+def _chunk_histogram(bucket_size: Optional[float],
+                     edges: Optional[List[float]],
+                     points: List[float]) -> Histogram:
+    return Histogram(bucket_size, edges).update(points)
+
+
+def histogram_of_chunks(chunks: Iterable[List[float]],
+                        bucket_size: Optional[float] = None,
+                        edges: Optional[List[float]] = None,
+                        processes: Optional[int] = None) -> Histogram:
+    """Гистограмма данных, поступающих пакетами chunks.
+       processes > 1 считает пакеты в пуле процессов и объединяет результаты"""
+    total = Histogram(bucket_size, edges)
+    if processes is not None and processes > 1:
+        # в работе не больше 2 * processes пакетов: chunks читается по мере
+        # объединения результатов, а не целиком заранее
+        with ProcessPoolExecutor(processes) as pool:
+            pending: deque = deque()
+            for chunk in chunks:
+                pending.append(pool.submit(_chunk_histogram, bucket_size, edges, chunk))
+                if len(pending) >= 2 * processes:
+                    total.merge(pending.popleft().result())
+            while pending:
+                total.merge(pending.popleft().result())
+    else:
+        for chunk in chunks:
+            total.update(chunk)
+    return total
+
+
+from chapters.linear_algebra import Matrix, Vector, dot
+from chapters.statistics import de_mean
+
+
+def _standardize(column: Vector) -> Optional[Vector]:
+    """Центрирует столбец и делит на корень суммы квадратов отклонений,
+       чтобы корреляция двух столбцов была их скалярным произведением.
+       Возвращает None, если вариации нет"""
+    deviations = de_mean(column)
+    norm = math.sqrt(sum(d * d for d in deviations))
+    if norm == 0:
+        return None
+    return [d / norm for d in deviations]
 
 
-def correlation_matrix(data: List[Vector]) -> Matrix:
-    """Возвращает матрицу размера len(data) x len(data),
-       (i, j)-й элемент которой является корреляцией между data[i] и data[j]"""
-    def correlation_ij(i: int, j: int) -> float:
-        return correlation(data[i], data[j])
+_worker_columns: List[Optional[Vector]] = []  # Стандартизованные столбцы в процессе-работнике
 
-    return make_matrix(len(data), len(data), correlation_ij)
 
+def _init_correlation_worker(columns: List[Optional[Vector]]) -> None:
+    global _worker_columns
+    _worker_columns = columns
 
-# Применение типизированных именованных кортежей
-import datetime
 
+def _correlation_block(rows: range, cols: range,
+                       columns: Optional[List[Optional[Vector]]] = None) -> List[Tuple[int, int, float]]:
+    """Корреляции пар (i, j), i из rows, j из cols, j >= i"""
+    if columns is None:
+        columns = _worker_columns
+    block = []
+    for i in rows:
+        z_i = columns[i]
+        for j in cols:
+            if j < i:
+                continue
+            z_j = columns[j]
+            block.append((i, j, dot(z_i, z_j) if z_i is not None and z_j is not None else 0))
+    return block
 
-# проблемный вариант, связанный с лишней занимаемой памятью и вероятностью присвоить лишнее (несуществующее) значение
-stock_price = {'closing_price': 102.06,
-               'date': datetime.date(2014, 8, 29),
-               'symbol': 'AAPL'}
 
+def _correlation_matrix_numpy(data: List[Vector], block_size: int) -> Matrix:
+    import numpy as np
 
-# Альтернатива - именованный кортеж
-from collections import namedtuple
+    data = np.asarray(data, dtype=float)
+    deviations = data - data.mean(axis=1, keepdims=True)
+    norms = np.sqrt((deviations ** 2).sum(axis=1))
+    varies = norms > 0
+    z = np.zeros_like(deviations)
+    z[varies] = deviations[varies] / norms[varies, None]
 
-StockPrice = namedtuple('StockPrice', ['symbol', 'date', 'closing_price'])
-price = StockPrice('MSFT', datetime.date(2018, 12, 14), 106.03)
+    k = len(z)
+    result = np.zeros((k, k))
+    for start_i in range(0, k, block_size):
+        for start_j in range(start_i, k, block_size):
+            block = z[start_i:start_i + block_size] @ z[start_j:start_j + block_size].T
+            result[start_i:start_i + block_size, start_j:start_j + block_size] = block
+    upper = np.triu(result)
+    return upper + np.triu(upper, 1).T
 
-assert price.symbol == 'MSFT'
-assert price.closing_price == 106.03
+
+def correlation_matrix(data: List[Vector],
+                       block_size: int = 64,
+                       processes: Optional[int] = None) -> Matrix:
+    """Возвращает матрицу размера len(data) x len(data),
+       (i, j)-й элемент которой является корреляцией между data[i] и data[j].
+       Каждый столбец стандартизуется один раз, вычисляется только верхний
+       треугольник (блоками block_size x block_size), нижний отражается.
+       processes > 1 распределяет блоки по пулу процессов"""
+    if get_backend() == 'numpy':
+        return _correlation_matrix_numpy(data, block_size)
+
+    k = len(data)
+    columns = [_standardize(column) for column in data]
+    blocks = [(range(start_i, min(start_i + block_size, k)),
+               range(start_j, min(start_j + block_size, k)))
+              for start_i in range(0, k, block_size)
+              for start_j in range(start_i, k, block_size)]
+
+    if processes is not None and processes > 1:
+        with ProcessPoolExecutor(processes,
+                                 initializer=_init_correlation_worker,
+                                 initargs=(columns,)) as pool:
+            results = pool.map(_correlation_block,
+                               [rows for rows, _ in blocks],
+                               [cols for _, cols in blocks])
+            entries = [entry for block in results for entry in block]
+    else:
+        entries = [entry
+                   for rows, cols in blocks
+                   for entry in _correlation_block(rows, cols, columns)]
+
+    matrix = [[0.0] * k for _ in range(k)]
+    for i, j, value in entries:
+        matrix[i][j] = matrix[j][i] = value
+    return matrix
 
 
+# Применение типизированных именованных кортежей
+import datetime
 from typing import NamedTuple
 
 
@@ -72,13 +276,6 @@ class StockPrice(NamedTuple):
         return self.symbol in ['MSFT', 'GOOG', 'FB', 'AMZN', 'AAPL']
 
 
-price = StockPrice('MSFT', datetime.date(2018, 12, 14), 106.03)
-
-assert price.symbol == 'MSFT'
-assert price.closing_price == 106.03
-assert price.is_high_tech()
-
-
 from dataclasses import dataclass
 
 # Имеет ту же проблему с "случайными" ключами, что и словари
@@ -93,13 +290,6 @@ class StockPrice2:
         return self.symbol in ['MSFT', 'GOOG', 'FB', 'AMZN', 'AAPL']
 
 
-price2 = StockPrice2('MSFT', datetime.date(2018, 12, 14), 106.03)
-
-assert price.symbol == 'MSFT'
-assert price.closing_price == 106.03
-assert price.is_high_tech()
-
-
 # Очистка и конвертирование
 from dateutil.parser import parse
 
@@ -111,16 +301,6 @@ def parse_row(row: List[str]) -> StockPrice:
                       closing_price=float(closing_price))
 
 
-# Тестируем функцию
-stock = parse_row(["MSFT", "2018-12-14", "106.03"])
-
-
-assert stock.symbol == 'MSFT'
-assert stock.closing_price == 106.03
-assert stock.date == datetime.date(2018, 12, 14)
-
-
-from typing import Optional
 import re
 
 
@@ -144,54 +324,135 @@ def try_parse_row(row: List[str]) -> Optional[StockPrice]:
     return StockPrice(symbol, date, closing_price)
 
 
-# Должно вернуть None в случае ошибок
-assert try_parse_row(["MSFT0", "2018-12-14", "106.03"]) is None
-assert try_parse_row(["MSFT", "2018-12--14", "106.03"]) is None
-assert try_parse_row(["MSFT", "2018-12-14", "x"]) is None
-
-# Но должно вернуть то же, что и раньше, если данные хорошие
-assert try_parse_row(["MSFT", "2018-12-14", "106.03"]) == stock
-
-
-data = [
-    StockPrice(symbol='MSFT',
-               date=datetime.date(2018, 12, 24),
-               closing_price=106.03),
-]
-
-# Максимальная цена акции AAPL
-max_aapl_price = max([stock_price.closing_price
-                     for stock_price in data
-                     if stock_price.symbol == "AAPL"], default=0)
-
-# Максимальная цена всех акций
-from collections import defaultdict
-
-
-max_prices: Dict[str, float] = defaultdict(lambda : float('-inf'))
-
-for sp in data:
-    symbol, closing_price = sp.symbol, sp.closing_price
-    if closing_price > max_prices[symbol]:
-        max_prices[symbol] = closing_price
+# Быстрая массовая загрузка цен из CSV-файла (строки symbol,date,closing_price)
+# - файл читается большими блоками строк, строки разбирает csv в C;
+# - даты вида ГГГГ-ММ-ДД разбираются date.fromisoformat, остальные - dateutil,
+#   результат кэшируется по строке даты (дат в файле гораздо меньше, чем строк);
+# - символ и цена проверяются заранее скомпилированными выражениями,
+#   поэтому плохие строки отсеиваются без исключений на каждую строку;
+# - результат хранится по столбцам: символы, порядковые номера дат, цены
+import array
+import csv
+import itertools
+
+_SYMBOL_PATTERN = re.compile(r"[A-Z]+")
+_ISO_DATE_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}")
+_DIGITS = r"\d(?:_?\d)*"  # как в float(): "_" допускается только между цифрами
+_FLOAT_PATTERN = re.compile(rf"\s*[+-]?(?:(?:{_DIGITS}\.?(?:{_DIGITS})?|\.{_DIGITS})(?:[eE][+-]?{_DIGITS})?"
+                            r"|inf|infinity|nan)\s*", re.IGNORECASE)
+
+
+class StockPriceColumns:
+    """Цены по столбцам: symbols[i], dates[i] (date.toordinal()), closing_prices[i]"""
+
+    def __init__(self) -> None:
+        self.symbols: List[str] = []
+        self.dates = array.array('l')
+        self.closing_prices = array.array('d')
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def extend(self, other: 'StockPriceColumns') -> None:
+        self.symbols.extend(other.symbols)
+        self.dates.extend(other.dates)
+        self.closing_prices.extend(other.closing_prices)
+
+    def __iter__(self) -> Iterator[StockPrice]:
+        from_ordinal = datetime.date.fromordinal
+        for symbol, ordinal, closing_price in zip(self.symbols, self.dates, self.closing_prices):
+            yield StockPrice(symbol, from_ordinal(ordinal), closing_price)
+
+
+class _DateCache(dict):
+    """Строка даты -> порядковый номер даты (или None для плохих дат)"""
+
+    def __missing__(self, date_: str) -> Optional[int]:
+        try:
+            if _ISO_DATE_PATTERN.fullmatch(date_):
+                ordinal = datetime.date.fromisoformat(date_).toordinal()
+            else:
+                ordinal = parse(date_).date().toordinal()
+        except (ValueError, OverflowError):
+            ordinal = None
+        self[date_] = ordinal
+        return ordinal
+
+
+def iter_stock_price_chunks(path: str,
+                            delimiter: str = ',',
+                            skip_header: bool = False,
+                            chunk_size: int = 1 << 20,
+                            quarantine: Optional[List[Tuple[int, List[str]]]] = None,
+                            bad_rows: Optional[Counter] = None) -> Iterator[StockPriceColumns]:
+    """Читает файл блоками примерно по chunk_size байт и выдает
+       столбцы каждого блока. Плохие строки (те, что try_parse_row
+       отверг бы) пропускаются: их число добавляется в bad_rows['bad'],
+       а сами строки с номерами - в quarantine, если он передан"""
+    date_cache = _DateCache()
+    symbol_cache: Dict[str, Optional[str]] = {}  # символ -> он же (один объект) или None
+    symbol_ok = _SYMBOL_PATTERN.fullmatch
+    float_ok = _FLOAT_PATTERN.fullmatch
+    line_number = 0
+
+    with open(path, newline='') as f:
+        if skip_header:
+            f.readline()
+            line_number += 1
+        while True:
+            lines = f.readlines(chunk_size)
+            if not lines:
+                return
+            columns = StockPriceColumns()
+            symbols, dates, closing_prices = (columns.symbols, columns.dates,
+                                              columns.closing_prices)
+            bad = 0
+            for row in csv.reader(lines, delimiter=delimiter):
+                line_number += 1
+                if len(row) == 3:
+                    symbol, date_, closing_price_ = row
+                    if symbol in symbol_cache:
+                        symbol = symbol_cache[symbol]
+                    else:
+                        symbol = symbol_cache[symbol] = symbol if symbol_ok(symbol) else None
+                    ordinal = date_cache[date_]
+                    if symbol is not None and ordinal is not None and float_ok(closing_price_):
+                        symbols.append(symbol)
+                        dates.append(ordinal)
+                        closing_prices.append(float(closing_price_))
+                        continue
+                bad += 1
+                if quarantine is not None:
+                    quarantine.append((line_number, row))
+            if bad_rows is not None:
+                bad_rows['bad'] += bad
+            yield columns
+
+
+def load_stock_prices(path: str,
+                      delimiter: str = ',',
+                      skip_header: bool = False,
+                      chunk_size: int = 1 << 20,
+                      quarantine: Optional[List[Tuple[int, List[str]]]] = None) -> Tuple[StockPriceColumns, int]:
+    """Загружает весь файл по столбцам, возвращает (столбцы, число плохих строк)"""
+    bad_rows: Counter = Counter()
+    result = StockPriceColumns()
+    for columns in iter_stock_price_chunks(path, delimiter, skip_header,
+                                           chunk_size, quarantine, bad_rows):
+        result.extend(columns)
+    return result, bad_rows['bad']
+
+
+def iter_stock_prices(path: str,
+                      delimiter: str = ',',
+                      skip_header: bool = False,
+                      chunk_size: int = 1 << 20) -> Iterator[StockPrice]:
+    """Поток StockPrice из файла без загрузки его целиком (плохие строки пропускаются)"""
+    for columns in iter_stock_price_chunks(path, delimiter, skip_header, chunk_size):
+        yield from columns
 
 
 # Максимальное/Минимальное однодневное процентное изменение
-from typing import List
-from collections import defaultdict
-
-
-# Собрать цены по символу
-prices: Dict[str, List[StockPrice]] = defaultdict(list)
-
-for sp in data:
-    prices[sp.symbol].append(sp)
-
-# Упорядочить по дате
-prices = {symbol: sorted(symbol_prices)
-          for symbol, symbol_prices in prices.items()}
-
-
 # Эти цены можно использовать для вычисления последовательности изменений день ко дню
 def pct_change(yesterday: StockPrice, today: StockPrice) -> float:
     return today.closing_price / yesterday.closing_price - 1
@@ -208,140 +469,324 @@ def day_over_day_changes(prices: List[StockPrice]) -> List[DailyChange]:
     return [DailyChange(symbol=today.symbol,
                         date=today.date,
                         pct_change=pct_change(yesterday, today))
-            for yesterday, today in zip(prices, prices[1:])]
-
-
-# И собираем их все
-all_changes = [change
-               for symbol_prices in prices.values()
-               for change in day_over_day_changes(symbol_prices)]
-
-max_change = max(all_changes, key=lambda change: change.pct_change, default=0)
-min_change = min(all_changes, key=lambda change: change.pct_change, default=0)
-
-
-# среднедневное изменение по месяцу
-changes_by_month: List[DailyChange] = {month: [] for month in range(1, 13)}
-
-for change in all_changes:
-    changes_by_month[change.date.month].append(change)
-
-# avg_daily_change = {
-#     month: sum(change.pct_change for change in changes) / len(changes)
-#     for month, changes in changes_by_month.items()
-# }
+            for yesterday, today in zip(prices, itertools.islice(prices, 1, None))]
+
+
+# Цены по столбцам вместо списков StockPrice.
+# Символы кодируются номерами (в порядке первого появления), строки
+# упорядочены по (символ, дата, цена), так что цены одной акции лежат
+# подряд: группировка - это просто границы отрезков
+class PriceTable:
+    def __init__(self, columns: StockPriceColumns) -> None:
+        code_of: Dict[str, int] = {}
+        codes = [code_of.setdefault(symbol, len(code_of)) for symbol in columns.symbols]
+        self.symbols = list(code_of)  # код -> символ
+
+        if get_backend() == 'numpy':
+            import numpy as np
+            # lexsort сортирует по последнему ключу в первую очередь
+            order = np.lexsort((np.asarray(columns.closing_prices),
+                                np.asarray(columns.dates),
+                                np.asarray(codes, dtype=np.int64))).tolist()
+        else:
+            order = sorted(range(len(codes)),
+                           key=lambda i: (codes[i], columns.dates[i], columns.closing_prices[i]))
+        self.codes = array.array('l', (codes[i] for i in order))
+        self.dates = array.array('l', (columns.dates[i] for i in order))
+        self.closing_prices = array.array('d', (columns.closing_prices[i] for i in order))
+
+        # Границы групп: цены символа с кодом c лежат в [starts[c], starts[c + 1])
+        self.starts = array.array('l', [0] * (len(self.symbols) + 1))
+        for code in self.codes:
+            self.starts[code + 1] += 1
+        for code in range(len(self.symbols)):
+            self.starts[code + 1] += self.starts[code]
+
+    @classmethod
+    def from_prices(cls, prices: Iterable[StockPrice]) -> 'PriceTable':
+        columns = StockPriceColumns()
+        for price in prices:
+            columns.symbols.append(price.symbol)
+            columns.dates.append(price.date.toordinal())
+            columns.closing_prices.append(price.closing_price)
+        return cls(columns)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def _groups(self) -> Iterator[Tuple[str, int, int]]:
+        for code, symbol in enumerate(self.symbols):
+            yield symbol, self.starts[code], self.starts[code + 1]
+
+    def _reduce_groups(self, reduce_fn: Callable, np_ufunc_name: str) -> Dict[str, float]:
+        if not self.symbols:
+            return {}
+        if get_backend() == 'numpy':
+            import numpy as np
+            ufunc = getattr(np, np_ufunc_name)
+            values = ufunc.reduceat(np.asarray(self.closing_prices),
+                                    np.asarray(self.starts[:-1]))
+            return dict(zip(self.symbols, values.tolist()))
+        prices = self.closing_prices
+        return {symbol: reduce_fn(prices[start:end]) for symbol, start, end in self._groups()}
+
+    def max_prices(self) -> Dict[str, float]:
+        """Максимальная цена каждой акции"""
+        return self._reduce_groups(max, 'maximum')
+
+    def min_prices(self) -> Dict[str, float]:
+        """Минимальная цена каждой акции"""
+        return self._reduce_groups(min, 'minimum')
+
+    def pct_changes(self) -> Tuple[array.array, array.array, array.array]:
+        """Изменения день ко дню по столбцам: (коды символов, даты, изменения).
+           Первая цена каждой акции изменения не имеет"""
+        if get_backend() == 'numpy':
+            import numpy as np
+            codes, dates = np.asarray(self.codes), np.asarray(self.dates)
+            prices = np.asarray(self.closing_prices)
+            same_symbol = codes[1:] == codes[:-1]
+            changes = prices[1:] / prices[:-1] - 1
+            return (array.array('l', codes[1:][same_symbol].tolist()),
+                    array.array('l', dates[1:][same_symbol].tolist()),
+                    array.array('d', changes[same_symbol].tolist()))
+
+        codes, dates = array.array('l'), array.array('l')
+        changes = array.array('d')
+        prices = self.closing_prices
+        for code, (_, start, end) in enumerate(self._groups()):
+            if end - start > 1:
+                codes.extend([code] * (end - start - 1))
+                dates.extend(self.dates[start + 1:end])
+                changes.extend([today / yesterday - 1
+                                for yesterday, today in zip(prices[start:end - 1],
+                                                            prices[start + 1:end])])
+        return codes, dates, changes
+
+    def all_changes(self) -> List[DailyChange]:
+        """То же, что day_over_day_changes по всем акциям"""
+        codes, dates, changes = self.pct_changes()
+        symbols, from_ordinal = self.symbols, datetime.date.fromordinal
+        return [DailyChange(symbols[code], from_ordinal(ordinal), change)
+                for code, ordinal, change in zip(codes, dates, changes)]
+
+    def changes_by_month(self) -> Dict[int, List[DailyChange]]:
+        changes_by_month: Dict[int, List[DailyChange]] = {month: [] for month in range(1, 13)}
+        for change in self.all_changes():
+            changes_by_month[change.date.month].append(change)
+        return changes_by_month
+
+    def avg_daily_change_by_month(self) -> Dict[int, float]:
+        """Среднее дневное изменение по месяцам (месяцы без данных пропускаются)"""
+        _, dates, changes = self.pct_changes()
+        months = _months(dates)
+        totals, counts = [0.0] * 13, [0] * 13
+        for month, change in zip(months, changes):
+            totals[month] += change
+            counts[month] += 1
+        return {month: totals[month] / counts[month]
+                for month in range(1, 13) if counts[month]}
+
+
+def _months(ordinals: Iterable[int]) -> List[int]:
+    """Месяц каждой даты; дата переводится из номера один раз"""
+    month_of: Dict[int, int] = {}
+    from_ordinal = datetime.date.fromordinal
+    return [month_of[o] if o in month_of else month_of.setdefault(o, from_ordinal(o).month)
+            for o in ordinals]
 
 
 # Шкалирование
-from chapters.linear_algebra import distance
-
-
-a_to_b = distance([63, 150], [67, 160])        # 10.77
-a_to_c = distance([63, 150], [70, 171])        # 22.14
-b_to_c = distance([67, 160], [70, 171])        # 11.40
-
-a_to_b = distance([160, 150], [170.2, 160])    # 14.28
-a_to_c = distance([160, 150], [177.8, 171])    # 27.53
-b_to_c = distance([170.2, 160], [177.8, 171])  # 13.37
-
-from typing import Tuple
-
-from chapters.linear_algebra import vector_mean
-from chapters.statistics import standard_deviation
+from chapters.linear_algebra import vector_mean, vector_sum, scalar_multiply
+
+
+class Scaler:
+    """Средние и стандартные отклонения столбцов, подогнанные один раз
+       (за один потоковый проход по алгоритму Уэлфорда) и применяемые
+       к любым новым данным. Сохраняется в JSON (save / load), чтобы
+       не подгонять заново при каждом запросе"""
+
+    def __init__(self) -> None:
+        self.n = 0
+        self.means: Vector = []
+        self._m2: Vector = []  # суммы квадратов отклонений по столбцам
+
+    def partial_fit(self, data: Iterable[Vector]) -> 'Scaler':
+        """Добавляет примеры (любой итерируемый объект, в т. ч. блок файла)"""
+        n, means, m2 = self.n, self.means, self._m2
+        for v in data:
+            if not means:
+                means, m2 = [0.0] * len(v), [0.0] * len(v)
+            assert len(v) == len(means), "векторы должны иметь одинаковую длину"
+            n += 1
+            for i, x in enumerate(v):
+                delta = x - means[i]
+                means[i] += delta / n
+                m2[i] += delta * (x - means[i])
+        self.n, self.means, self._m2 = n, means, m2
+        return self
+
+    def fit(self, data: Iterable[Vector]) -> 'Scaler':
+        self.n, self.means, self._m2 = 0, [], []
+        return self.partial_fit(data)
+
+    @property
+    def stdevs(self) -> Vector:
+        assert self.n >= 2, "дисперсия требует наличия не менее двух элементов"
+        return [math.sqrt(m2_i / (self.n - 1)) for m2_i in self._m2]
+
+    def transform(self, data: Iterable[Vector], in_place: bool = False) -> List[Vector]:
+        """Шкалирует примеры; позиции без вариации остаются как есть.
+           in_place=True изменяет сами векторы data вместо копий"""
+        scaled_positions = [(i, mean_i, stdev_i)
+                            for i, (mean_i, stdev_i) in enumerate(zip(self.means, self.stdevs))
+                            if stdev_i > 0]
+        result = []
+        for v in data:
+            if not in_place:
+                v = list(v)
+            for i, mean_i, stdev_i in scaled_positions:
+                v[i] = (v[i] - mean_i) / stdev_i
+            result.append(v)
+        return result
+
+    def transform_chunks(self,
+                         chunks: Iterable[Iterable[Vector]],
+                         in_place: bool = False) -> Iterator[List[Vector]]:
+        """Шкалирует данные блок за блоком, не держа их в памяти целиком"""
+        for chunk in chunks:
+            yield self.transform(chunk, in_place)
+
+    def inverse_transform(self, data: Iterable[Vector]) -> List[Vector]:
+        stdevs = self.stdevs
+        return [[x * stdev_i + mean_i if stdev_i > 0 else x
+                 for x, mean_i, stdev_i in zip(v, self.means, stdevs)]
+                for v in data]
+
+    def save(self, path: str) -> None:
+        with open(path, 'w') as f:
+            json.dump({'n': self.n, 'means': self.means, 'm2': self._m2}, f)
+
+    @classmethod
+    def load(cls, path: str) -> 'Scaler':
+        with open(path) as f:
+            state = json.load(f)
+        scaler = cls()
+        scaler.n, scaler.means, scaler._m2 = state['n'], state['means'], state['m2']
+        return scaler
 
 
 def scale(data: List[Vector]) -> Tuple[Vector, Vector]:
     """Возвращает среднее значение и стандартное отклонение
        для каждой позиции"""
-    dim = len(data[0])
+    scaler = Scaler().fit(data)
+    return scaler.means, scaler.stdevs
 
-    means = vector_mean(data)
-    stdevs = [standard_deviation([vector[i] for vector in data])
-              for i in range(dim)]
 
-    return means, stdevs
-
-
-from chapters.linear_algebra import distance
-
-a_to_b = distance([63, 150], [67, 160])        # 10.77
-a_to_c = distance([63, 150], [70, 171])        # 22.14
-b_to_c = distance([67, 160], [70, 171])        # 11.40
-
-a_to_b = distance([160, 150], [170.2, 160])    # 14.28
-a_to_c = distance([160, 150], [177.8, 171])    # 27.53
-b_to_c = distance([170.2, 160], [177.8, 171])  # 13.37
-
-from typing import Tuple
-
-from chapters.linear_algebra import vector_mean
-from chapters.statistics import standard_deviation
-
-
-def scale(data: List[Vector]) -> Tuple[Vector, Vector]:
-    """returns the means and standard deviations for each position"""
-    dim = len(data[0])
-
-    means = vector_mean(data)
-    stdevs = [standard_deviation([vector[i] for vector in data])
-              for i in range(dim)]
-
-    return means, stdevs
-
-vectors = [[-3, -1, 1], [-1, 0, 1], [1, 1, 1]]
-means, stdevs = scale(vectors)
-assert means == [-1, 0, 1]
-assert stdevs == [2, 1, 0]
-
-
-def rescale(data: List[Vector]) -> List[Vector]:
+def rescale(data: List[Vector], in_place: bool = False) -> List[Vector]:
     """
     Шкалирует входные данные так, чтобы каждый столбец
     имел нулевое среднее значение и станартное отклонение, равное 1
-    (оставляет позицию как есть, если ее стандартное отклонение равно 0)
+    (оставляет позицию как есть, если ее стандартное отклонение равно 0).
+    По умолчанию возвращает копии векторов, in_place=True изменяет data
     """
-    dim = len(data[0])
-    means, stdevs = scale(data)
-
-    # Make a copy of each vector
-    rescaled = [v[:] for v in data]
-
-    for v in rescaled:
-        for i in range(dim):
-            if stdevs[i] > 0:
-                v[i] = (v[i] - means[i]) / stdevs[i]
-
-    return rescaled
-
-means, stdevs = scale(rescale(vectors))
-assert means == [0, 0, 1]
-assert stdevs == [1, 1, 0]
-
+    return Scaler().fit(data).transform(data, in_place)
 
 
 # библиотека tqdm
 import tqdm
 
-for i in tqdm.tqdm(range(100)):
-    # Делать что-то медленное
-    _ = [random.random() for _ in range(1000000)]
-
-
-def primes_up_to(n: int) -> List[int]:
-    primes = [2]
-
-    with tqdm.trange(3, n) as t:
-        for i in t:
-            # i является простым, если нет меньшего простого, которое делит его
-            i_is_prime = not any(i % p == 0 for p in primes)
-            if i_is_prime:
-                primes.append(i)
-            t.set_description(f"{len(primes)} простых")
 
-    return primes
-
-
-my_primes = primes_up_to(100_000)
+# Простые числа: решето Эратосфена в bytearray.
+# Числа обрабатываются отрезками по segment_size, поэтому память ограничена
+# размером отрезка (плюс простые до sqrt(n)), а не n. Вычеркивание кратных -
+# присваивание срезу, без цикла Python по каждому числу
+_SEGMENT_SIZE = 1 << 20
+
+_worker_base_primes: List[int] = []  # Простые до sqrt(n) в процессе-работнике
+
+
+def _init_sieve_worker(base_primes: List[int]) -> None:
+    global _worker_base_primes
+    _worker_base_primes = base_primes
+
+
+def _small_primes(n: int) -> List[int]:
+    """Простые числа меньше n (обычное решето для небольших n)"""
+    if n < 3:
+        return []
+    sieve = bytearray([1]) * n
+    sieve[0] = sieve[1] = 0
+    for p in range(2, math.isqrt(n - 1) + 1):
+        if sieve[p]:
+            sieve[p * p::p] = bytes(len(range(p * p, n, p)))
+    return list(itertools.compress(range(n), sieve))
+
+
+def _sieve_segment(low: int, high: int,
+                   base_primes: Optional[List[int]] = None) -> array.array:
+    """Простые числа из [low, high); base_primes должны содержать
+       все простые до sqrt(high)"""
+    if base_primes is None:
+        base_primes = _worker_base_primes
+    sieve = bytearray([1]) * (high - low)
+    for p in base_primes:
+        if p * p >= high:
+            break
+        start = max(p * p, (low + p - 1) // p * p)
+        sieve[start - low::p] = bytes(len(range(start, high, p)))
+    for i in range(low, min(high, 2)):  # 0 и 1 не простые
+        sieve[i - low] = 0
+    if get_backend() == 'numpy':
+        import numpy as np
+        primes = np.flatnonzero(np.frombuffer(sieve, dtype=np.uint8)) + low
+        return array.array('q', primes.astype(np.int64).tobytes())
+    return array.array('q', itertools.compress(range(low, high), sieve))
+
+
+def iter_primes(n: int,
+                segment_size: int = _SEGMENT_SIZE,
+                processes: Optional[int] = None,
+                progress: bool = False) -> Iterator[int]:
+    """Простые числа меньше n по возрастанию, отрезок за отрезком.
+       processes > 1 просеивает отрезки в пуле процессов (в работе не больше
+       2 * processes отрезков, так что память остается ограниченной);
+       progress показывает индикатор tqdm, обновляемый раз на отрезок"""
+    base_primes = _small_primes(math.isqrt(max(n - 1, 0)) + 1)
+    bounds = [(low, min(low + segment_size, n)) for low in range(0, n, segment_size)]
+    bar = tqdm.tqdm(total=len(bounds), disable=not progress)
+    found = 0
+
+    def report(segment: array.array) -> array.array:
+        nonlocal found
+        found += len(segment)
+        bar.set_description(f"{found} простых", refresh=False)
+        bar.update()
+        return segment
+
+    with bar:
+        if processes is not None and processes > 1:
+            with ProcessPoolExecutor(processes,
+                                     initializer=_init_sieve_worker,
+                                     initargs=(base_primes,)) as pool:
+                pending: deque = deque()
+                for low, high in bounds:
+                    pending.append(pool.submit(_sieve_segment, low, high))
+                    if len(pending) >= 2 * processes:
+                        yield from report(pending.popleft().result())
+                while pending:
+                    yield from report(pending.popleft().result())
+        else:
+            for low, high in bounds:
+                yield from report(_sieve_segment(low, high, base_primes))
+
+
+def primes_up_to(n: int,
+                 segment_size: int = _SEGMENT_SIZE,
+                 processes: Optional[int] = None,
+                 progress: bool = True) -> List[int]:
+    """Список простых чисел меньше n"""
+    return list(iter_primes(n, segment_size, processes, progress))
 
 
 # Снижение размерности
@@ -375,6 +820,176 @@ def directional_variance(data: List[Vector], w: Vector) -> float:
 def directional_variance_gradient(data: List[Vector], w: Vector) -> Vector:
     """Градиент направленной дисперсии по отношению к w"""
     w_dir = direction(w)
-    return [sum(2 * dot(v, w_dir) * v[i] for v in data)
-            for i in range(len(w))]
+    # Проекция каждого примера считается один раз (O(n·d), а не O(n·d^2)),
+    # а сумма 2 * dot(v, w_dir) * v накапливается за один проход
+    return vector_sum(scalar_multiply(2 * dot(v, w_dir), v) for v in data)
+
+
+from chapters.gradient_descent import gradient_step
+
+
+def first_principal_component(data: List[Vector],
+                              n: int = 100,
+                              step_size: float = 0.1) -> Vector:
+    """Направление наибольшей дисперсии градиентным подъемом"""
+    # Начать со случайной догадки
+    guess = [1.0 for _ in data[0]]
+
+    for _ in range(n):
+        gradient = directional_variance_gradient(data, guess)
+        guess = gradient_step(guess, gradient, step_size)
+
+    return direction(guess)
+
+
+def project(v: Vector, w: Vector) -> Vector:
+    """Вернуть проекцию v на направление w"""
+    projection_length = dot(v, w)
+    return scalar_multiply(projection_length, w)
+
+
+def remove_projection_from_vector(v: Vector, w: Vector) -> Vector:
+    """Проецирует v на w и вычитает результат из v"""
+    return subtract(v, project(v, w))
 
+
+def remove_projection(data: List[Vector], w: Vector) -> List[Vector]:
+    return [remove_projection_from_vector(v, w) for v in data]
+
+
+# Метод главных компонент без градиентного подъема:
+# ковариационная матрица считается один раз, компоненты -
+# ее собственные векторы (степенной метод с исчерпыванием
+# или numpy.linalg.eigh при движке numpy)
+
+
+def _matrix_vector(A: Matrix, v: Vector) -> Vector:
+    return [dot(A_i, v) for A_i in A]
+
+
+class PCA:
+    """Главные компоненты с подгонкой по частям (partial_fit):
+       хранятся только число примеров, среднее и матрица сумм
+       произведений отклонений (d x d), поэтому данные могут не помещаться
+       в память целиком"""
+
+    def __init__(self,
+                 num_components: int,
+                 max_iterations: int = 1000,
+                 tolerance: float = 1e-12) -> None:
+        self.num_components = num_components
+        self.max_iterations = max_iterations
+        self.tolerance = tolerance
+        self.reset()
+
+    def reset(self) -> None:
+        self.n = 0
+        self.mean: Vector = []
+        self._comoment: Matrix = []  # сумма (x - mean)(x - mean)^T
+        self._components: Optional[List[Vector]] = None
+        self._explained_variance: Optional[Vector] = None
+
+    def partial_fit(self, chunk: Iterable[Vector]) -> 'PCA':
+        """Добавляет блок примеров (объединение как в RunningStats)"""
+        chunk = list(chunk)
+        if not chunk:
+            return self
+        m = len(chunk)
+        chunk_mean = vector_mean(chunk)
+        centered = se_mean(chunk)
+        dim = len(chunk_mean)
+        chunk_comoment = [[0.0] * dim for _ in range(dim)]
+        for v in centered:
+            for i, v_i in enumerate(v):
+                if v_i:
+                    row = chunk_comoment[i]
+                    for j in range(i, dim):
+                        row[j] += v_i * v[j]
+        for i in range(dim):
+            for j in range(i):
+                chunk_comoment[i][j] = chunk_comoment[j][i]
+
+        if not self.n:
+            self.n, self.mean, self._comoment = m, list(chunk_mean), chunk_comoment
+        else:
+            assert len(self.mean) == dim, "примеры должны иметь одинаковую длину"
+            n = self.n + m
+            delta = subtract(chunk_mean, self.mean)
+            weight = self.n * m / n
+            self._comoment = [[c_ij + chunk_c_ij + weight * delta_i * delta_j
+                               for c_ij, chunk_c_ij, delta_j in zip(c_i, chunk_c_i, delta)]
+                              for c_i, chunk_c_i, delta_i in zip(self._comoment, chunk_comoment, delta)]
+            self.mean = [mean_i + delta_i * m / n for mean_i, delta_i in zip(self.mean, delta)]
+            self.n = n
+        self._components = None
+        self._explained_variance = None
+        return self
+
+    def fit(self, data: Iterable[Vector]) -> 'PCA':
+        self.reset()
+        return self.partial_fit(data)
+
+    def covariance(self) -> Matrix:
+        assert self.n >= 2, "ковариация требует наличия не менее двух элементов"
+        return [[c_ij / (self.n - 1) for c_ij in c_i] for c_i in self._comoment]
+
+    @property
+    def components(self) -> List[Vector]:
+        if self._components is None:
+            self._decompose()
+        return self._components
+
+    @property
+    def explained_variance(self) -> Vector:
+        if self._explained_variance is None:
+            self._decompose()
+        return self._explained_variance
+
+    def _decompose(self) -> None:
+        covariance = self.covariance()
+        k = min(self.num_components, len(covariance))
+
+        if get_backend() == 'numpy':
+            import numpy as np
+            eigenvalues, eigenvectors = np.linalg.eigh(np.array(covariance))
+            order = np.argsort(eigenvalues)[::-1][:k]
+            pairs = [(float(eigenvalues[i]), eigenvectors[:, i].tolist()) for i in order]
+        else:
+            pairs = []
+            rng = random.Random(0)  # фиксированная отправная точка - воспроизводимость
+            for _ in range(k):
+                w = direction([rng.uniform(-1, 1) for _ in covariance])
+                for _ in range(self.max_iterations):
+                    next_w = _matrix_vector(covariance, w)
+                    if not any(next_w):  # дисперсии не осталось
+                        break
+                    next_w = direction(next_w)
+                    converged = magnitude(subtract(next_w, w)) < self.tolerance
+                    w = next_w
+                    if converged:
+                        break
+                eigenvalue = dot(w, _matrix_vector(covariance, w))
+                pairs.append((eigenvalue, w))
+                # Исчерпывание: убрать найденную компоненту из матрицы
+                covariance = [[c_ij - eigenvalue * w_i * w_j for c_ij, w_j in zip(c_i, w)]
+                              for c_i, w_i in zip(covariance, w)]
+
+        # Знак собственного вектора произволен: наибольшая по модулю координата > 0
+        components = []
+        for _, w in pairs:
+            largest = max(w, key=abs)
+            components.append([-w_i for w_i in w] if largest < 0 else list(w))
+        self._components = components
+        self._explained_variance = [eigenvalue for eigenvalue, _ in pairs]
+
+    def transform(self, data: Iterable[Vector]) -> List[Vector]:
+        """Координаты примеров в базисе главных компонент"""
+        components, mean = self.components, self.mean
+        return [[dot(centered, w) for w in components]
+                for centered in (subtract(v, mean) for v in data)]
+
+    def inverse_transform(self, data: Iterable[Vector]) -> List[Vector]:
+        """Восстанавливает примеры из их координат по компонентам"""
+        components, mean = self.components, self.mean
+        return [vector_sum([mean, *(scalar_multiply(z_k, w) for z_k, w in zip(z, components))])
+                for z in data]
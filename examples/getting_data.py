@@ -0,0 +1,312 @@
+# Примеры к главе "Получение данных" (требуется доступ к сети)
+# Запуск из корня репозитория: python -m examples.getting_data
+import re
+
+from bs4 import BeautifulSoup
+import requests
+
+from chapters.getting_data import regex
+
+
+# egrep и line_count из командной строки (сеть не нужна):
+#   cat Somefile.txt | python -m chapters.getting_data egrep "[0-9]" | python -m chapters.getting_data line_count
+# Для больших файлов: python -m chapters.getting_data egrep "[0-9]" big.log --jobs 4
+import io
+import os
+import tempfile
+
+from chapters.getting_data import grep_lines, count_lines, line_ranges
+
+lines_path = os.path.join(tempfile.mkdtemp(), 'lines.txt')
+with open(lines_path, 'wb') as f:
+    f.write(b"no digits\nline 2\n\nline 4")
+
+with open(lines_path, 'rb') as f:
+    assert list(grep_lines(re.compile(rb"[0-9]"), f)) == [b"line 2\n", b"line 4"]
+with open(lines_path, 'rb') as f:
+    assert count_lines(f) == 4
+assert count_lines(io.BytesIO(b"")) == 0
+
+# Шаблоны с классами символов сопоставляются с текстом, как у построчного egrep
+from chapters.getting_data import compile_pattern
+
+russian = io.BytesIO("Привет, мир\nhello\n".encode())
+assert list(grep_lines(compile_pattern(r"\w+ир"), russian)) == ["Привет, мир\n".encode()]
+
+# ...и дают те же строки, что re.search по тексту, для экранирований вне ASCII и флага u
+cafe_lines = ["café\n", "cafe\n", "abc\n"]
+for pattern in [r"(?u)abc", r"\N{LATIN SMALL LETTER E WITH ACUTE}", r"café", r"caf\U000000e9",
+                r"caf\xe9", r"caf[\x80-\xff]$", r"caf\351", r"caf.$", r"(?-i:caf)"]:
+    expected = [line.encode() for line in cafe_lines if re.search(pattern, line)]
+    found = list(grep_lines(compile_pattern(pattern), io.BytesIO("".join(cafe_lines).encode())))
+    assert found == expected, pattern
+assert line_ranges(lines_path, range_size=8) == [(0, 10), (10, 18), (18, 24)]
+
+
+# Обход сайтов на локальном сервере-заглушке (сеть не нужна):
+# каждая страница отвечает с задержкой и поддерживает ETag
+import hashlib
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from chapters.getting_data import Crawler, press_release_links
+
+NUM_REPRESENTATIVES = 20
+PAGE_DELAY = 0.1  # секунд на ответ
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        base = f"http://127.0.0.1:{self.server.server_port}"
+        if self.path == '/representatives':
+            body = "".join(f'<a href="{base}/rep{i}">rep {i}</a><a href="{base}/rep{i}">again</a>'
+                           for i in range(NUM_REPRESENTATIVES))
+        else:
+            body = f'<a href="{self.path}/press">Press Releases</a><a href="/about">About</a>'
+        body = body.encode()
+        etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+
+        time.sleep(PAGE_DELAY)
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class StandInServer(ThreadingHTTPServer):
+    # очередь по умолчанию (5) переполняется при 10 одновременных
+    # соединениях, и ядро повторяет SYN только через секунду
+    request_queue_size = 64
+    daemon_threads = True
+
+
+server = StandInServer(('127.0.0.1', 0), StandInHandler)
+threading.Thread(target=server.serve_forever, daemon=True).start()
+index_url = f"http://127.0.0.1:{server.server_port}/representatives"
+local_regex = r"^http://127\.0\.0\.1:\d+/rep\d+$"
+
+# Время обхода падает с ростом числа одновременных запросов
+cache_dir = tempfile.mkdtemp()
+elapsed = {}
+for max_workers in [1, 10]:
+    with Crawler(max_workers=max_workers, cache_dir=os.path.join(cache_dir, str(max_workers))) as crawler:
+        start = time.perf_counter()
+        releases = press_release_links(crawler, index_url, local_regex)
+        elapsed[max_workers] = time.perf_counter() - start
+
+assert len(releases) == NUM_REPRESENTATIVES  # повторяющиеся ссылки скачаны один раз
+assert all(links == {url + "/press"} for url, links in releases.items())
+assert elapsed[10] < elapsed[1] / 2
+
+# Повторный обход: сервер отвечает 304, тела страниц берутся из кэша
+with Crawler(max_workers=10, cache_dir=os.path.join(cache_dir, '10')) as crawler:
+    assert press_release_links(crawler, index_url, local_regex) == releases
+    assert crawler.stats == {'not_modified': NUM_REPRESENTATIVES + 1}
+
+# Не больше 5 запросов в секунду к одному хосту
+with Crawler(max_workers=10, per_host_rate=5) as crawler:
+    start = time.perf_counter()
+    crawler.fetch_all(f"{index_url[:-len('/representatives')]}/rep{i}" for i in range(6))
+    assert time.perf_counter() - start >= 1
+
+server.shutdown()
+
+
+# Клиент GitHub на локальной заглушке API: 250 хранилищ по 100 на страницу,
+# заголовок Link указывает следующую и последнюю страницы
+import datetime
+import json
+import random
+from urllib.parse import urlsplit, parse_qsl
+
+from chapters.getting_data import GitHubClient, Repo, last_repos
+
+NUM_REPOS = 250
+random_days = random.Random(0).sample(range(3000), NUM_REPOS)
+mock_repos = [{"name": f"repo{i}", "language": ["Python", "R", None][i % 3],
+               "created_at": (datetime.datetime(2010, 1, 1) + datetime.timedelta(days))
+                             .strftime("%Y-%m-%dT%H:%M:%SZ"),
+               "description": "x" * 500}  # лишние поля клиент не хранит
+              for i, days in enumerate(random_days)]
+
+
+class MockGitHubHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        query = dict(parse_qsl(parts.query))
+        per_page, page = int(query.get('per_page', 30)), int(query.get('page', 1))
+        last_page = (NUM_REPOS + per_page - 1) // per_page
+        body = json.dumps(mock_repos[(page - 1) * per_page:page * per_page]).encode()
+        etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+
+        time.sleep(PAGE_DELAY)
+        self.send_response(304 if self.headers.get('If-None-Match') == etag else 200)
+        base = f"http://127.0.0.1:{self.server.server_port}{parts.path}?per_page={per_page}"
+        links = [f'<{base}&page={page + 1}>; rel="next"'] if page < last_page else []
+        self.send_header('Link', ", ".join(links + [f'<{base}&page={last_page}>; rel="last"']))
+        self.send_header('ETag', etag)
+        if self.headers.get('If-None-Match') == etag:
+            self.end_headers()
+            return
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+api = StandInServer(('127.0.0.1', 0), MockGitHubHandler)
+threading.Thread(target=api.serve_forever, daemon=True).start()
+api_url = f"http://127.0.0.1:{api.server_port}"
+
+github_cache = tempfile.mkdtemp()
+with Crawler(max_workers=4, cache_dir=github_cache) as crawler:
+    mock_user_repos = GitHubClient(crawler, api_url).user_repos("joelgrus")
+assert [repo.name for repo in mock_user_repos] == [repo["name"] for repo in mock_repos]
+assert all(isinstance(repo, Repo) for repo in mock_user_repos)
+
+newest = sorted(mock_repos, key=lambda r: r["created_at"], reverse=True)[:5]
+assert [repo.name for repo in last_repos(mock_user_repos, 5)] == [r["name"] for r in newest]
+
+# Повторный запрос: все страницы подтверждены ответом 304 и прочитаны из кэша
+with Crawler(max_workers=4, cache_dir=github_cache) as crawler:
+    assert GitHubClient(crawler, api_url).user_repos("joelgrus") == mock_user_repos
+    assert crawler.stats == {'not_modified': 3}
+
+api.shutdown()
+
+# Массив разбирается по блокам любой длины, а оборванный или испорченный
+# ответ дает ошибку, а не неполный список
+from chapters.getting_data import iter_json_array
+
+page = b'[{"name": "a"}, 2 , "x,y"]\n'
+assert list(iter_json_array([page[i:i + 1] for i in range(len(page))])) == [{"name": "a"}, 2, "x,y"]
+for broken in [b'[1 2]', b'[,1]', b'[1,,2]', b'[1,]', b'[1, 2']:
+    try:
+        list(iter_json_array([broken]))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError(broken)
+
+
+url = "https://raw.githubusercontent.com/joelgrus/data/master/getting-data.html"
+html = requests.get(url).text
+soup = BeautifulSoup(html, 'html5lib')
+
+first_paragraph = soup.find('p')  # первый тег <p>, можно просто soup.p
+first_paragraph_text = soup.p.text  # Текст первого элемента <p>
+first_paragraph_words = soup.p.text.split()  # Слова первого элемента
+
+first_paragraph_id = soup.p['id']  # дает ошибку, если id не существует
+first_paragraph_id2 = soup.p.get('id')  # Возвращает None, если id нет
+
+all_paragraphs = soup.find_all('p')  # или просто soup('p')
+paragraphs_with_ids = [p for p in soup('p') if p.get('id')]
+
+important_paragraphs = soup('p', {'class': 'important'})
+important_paragraphs2 = soup('p', 'important')
+important_paragraphs3 = [p for p in soup('p') if 'important' in p.get('class', [])]
+
+# Элементы <span> внутри элементов <div>
+# Предупреждение: вернет тот же span несколько раз,
+# если он находится внутри нескольких элементов div.
+# Нужно быть смышленее в этом случае
+spans_inside_divs = [span
+                     for div in soup('div')  # для каждого <div> на странице
+                     for span in div('span')]  # отыскать каждый <span> внутри него
+
+# Пример: Слежение за Конгрессом
+url = 'https://www.house.gov/representatives'
+text = requests.get(url).text
+soup = BeautifulSoup(text, 'html5lib')
+
+all_urls = [a['href']
+            for a in soup('a')
+            if a.has_attr('href')]
+
+print(len(all_urls))  # Слишком много - 967
+
+# напишем несколько тестов
+assert re.match(regex, "http://joel.house.gov")
+assert re.match(regex, "https://joel.house.gov")
+assert re.match(regex, "http://joel.house.gov/")
+assert re.match(regex, "https://joel.house.gov/")
+assert not re.match(regex, "joel.house.gov")
+assert not re.match(regex, "http://joel.house.com")
+assert not re.match(regex, "https://joel.house.gov/biography")
+
+# И теперь применим
+good_urls = [url for url in all_urls if re.match(regex, url)]
+
+print(len(good_urls))  # всё еще много - 880
+
+# устраним дубликаты
+good_urls = list(set(good_urls))
+
+print(len(good_urls))  # теперь 440
+
+html = requests.get('https://jayapal.house.gov').text
+soup = BeautifulSoup(html, 'html5lib')
+
+# Мы используем множество, т. к. ссылки могут появляться многократно
+links = {a['href'] for a in soup('a') if 'press releases' in a.text.lower()}
+
+print(links)
+
+# То же для всех сайтов сразу: параллельно, не чаще 2 запросов в секунду
+# к одному сайту, с кэшем ответов (повторный запуск почти ничего не скачивает)
+with Crawler(max_workers=16, per_host_rate=2,
+             cache_dir=os.path.join(tempfile.gettempdir(), 'house_gov_cache')) as crawler:
+    all_press_releases = press_release_links(crawler)
+
+print(sum(len(links) for links in all_press_releases.values()))
+
+
+import json
+
+
+serialized = """{ "title" : "Data Science Book",
+                  "author" : "Joel Grus",
+                  "publicationYear" : 2019,
+                  "topics" : [ "data", "science", "data science"] }"""
+
+# Разобрать JSON, создав Питоновский словарь
+deserialized = json.loads(serialized)
+
+assert deserialized["publicationYear"] == 2019
+assert "data science" in deserialized["topics"]
+
+
+github_user = "joelgrus"
+
+# Все страницы списка, с кэшем ответов; от хранилища остаются только
+# имя, язык и дата создания
+with Crawler(max_workers=4,
+             cache_dir=os.path.join(tempfile.gettempdir(), 'github_cache')) as crawler:
+    repos = GitHubClient(crawler).user_repos(github_user)
+
+
+from collections import Counter
+
+dates = [repo.created_at for repo in repos]  # Список дат
+month_counts = Counter(date.month for date in dates)  # число месяцев
+weekday_counts = Counter(date.weekday() for date in dates)  # число будних дней
+
+last_5_repos = last_repos(repos, 5)  # последние 5 хранилищ
+
+last_5_languages = [repo.language  # Последние 5 языков
+                    for repo in last_5_repos]
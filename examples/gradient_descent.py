@@ -0,0 +1,148 @@
+# Примеры к главе "Градиентный спуск"
+# Запуск из корня репозитория: python -m examples.gradient_descent
+import random
+
+from chapters.linear_algebra import distance, vector_mean
+from chapters.gradient_descent import (gradient_step, sum_of_squares_gradient,
+                                       linear_gradient, mini_batches,
+                                       sum_of_squares, estimate_gradient,
+                                       check_gradient)
+
+
+# Оценка градиента: n + 1 вызовов функции (или 2n для центральных разностей)
+# и сверка с аналитическим градиентом
+v = [random.uniform(-10, 10) for i in range(3)]
+assert check_gradient(sum_of_squares, sum_of_squares_gradient, v) < 1e-6
+assert distance(estimate_gradient(sum_of_squares, v, central=True),
+                sum_of_squares_gradient(v)) < 1e-6
+
+
+# Подобрать случайную отправную точку
+v = [random.uniform(-10, 10) for i in range(3)]
+
+for epoch in range(1000):
+    grad = sum_of_squares_gradient(v)  # Вычислить градиент в v
+    v = gradient_step(v, grad, -0.01)  # Сделать отрицательный градиентный шаг
+
+    print(epoch, v)
+
+
+assert distance(v, [0, 0, 0]) < 0.00001  # v должно быть близко к 0
+
+
+# простой пример (поиск углового коэф-та)
+# х изменяется в интервале от -50 до 49, у всегда равно 20 * х + 5
+inputs = [(x, 20 * x + 5) for x in range(-50, 50)]
+
+
+# 1) Начать со случайного значения theta
+# 2) Вычислить среднее значение градиентов
+# 3) Скорректировать theta в этом направлении
+# 4) Повторить
+
+# Начать со случайных значений наклона и пересечения
+theta = [random.uniform(-1, 1), random.uniform(-1, 1)]
+
+learning_rate = 0.001  # Темп усвоения
+
+for epoch in range(5000):
+    # Вычислить среднее значение градиентов
+    grad = vector_mean([linear_gradient(x, y, theta) for x, y in inputs])
+
+    # Сделать шаг в этом направлении
+    theta = gradient_step(theta, grad, -learning_rate)
+    print(epoch, theta)
+
+
+slope, intercept = theta
+assert 19.9 < slope < 20.1, "наклон должен быть равен примерно 20"
+assert 4.9 < intercept < 5.1, "пересечение должно быть равным примерно 5"
+
+
+# мини-пакетный градиентный спуск
+theta = [random.uniform(-1, 1), random.uniform(-1, 1)]
+
+for epoch in range(1000):
+    for batch in mini_batches(inputs, batch_size=20):
+        grad = vector_mean([linear_gradient(x, y, theta) for x, y in batch])
+        theta = gradient_step(theta, grad, -learning_rate)
+    print(epoch, theta)
+
+
+slope, intercept = theta
+assert 19.9 < slope < 20.1, "наклон должен быть равен примерно 20"
+assert 4.9 < intercept < 5.1, "пересечение должно быть равным примерно 5"
+
+
+# Пакеты-представления: примеры перемешиваются между пакетами каждую эпоху,
+# данные не копируются, следующий пакет готовится в фоновом потоке
+from chapters.gradient_descent import mini_batch_views, prefetch
+
+theta = [random.uniform(-1, 1), random.uniform(-1, 1)]
+
+for epoch in range(1000):
+    for batch in prefetch(mini_batch_views(inputs, batch_size=20)):
+        grad = vector_mean([linear_gradient(x, y, theta) for x, y in batch])
+        theta = gradient_step(theta, grad, -learning_rate)
+    print(epoch, theta)
+
+
+slope, intercept = theta
+assert 19.9 < slope < 20.1, "наклон должен быть равен примерно 20"
+assert 4.9 < intercept < 5.1, "пересечение должно быть равным примерно 5"
+
+
+# Стохастический градиентный спуск
+# шаги делаются на основе одного тренировочного примера за раз
+
+theta = [random.uniform(-1, 1), random.uniform(-1, 1)]
+
+for epoch in range(100):
+    for x, y in inputs:
+        grad = linear_gradient(x, y, theta)
+        theta = gradient_step(theta, grad, -learning_rate)
+        print(epoch, theta)
+
+
+slope, intercept = theta
+assert 19.9 < slope < 20.1, "наклон должен быть равен примерно 20"
+assert 4.9 < intercept < 5.1, "пересечение должно быть равным примерно 5"
+
+
+# То же полным пакетом без списков градиентов по примерам;
+# обучение останавливается, когда градиент становится достаточно малым
+from chapters.gradient_descent import fit_linear
+
+slope, intercept = fit_linear([x for x, _ in inputs], [y for _, y in inputs],
+                              learning_rate=learning_rate,
+                              max_epochs=20_000, tolerance=1e-6)
+assert 19.9 < slope < 20.1, "наклон должен быть равен примерно 20"
+assert 4.9 < intercept < 5.1, "пересечение должно быть равным примерно 5"
+
+
+# Оптимизаторы: адаптивный шаг сходится на порядок быстрее постоянного
+from chapters.gradient_descent import Optimizer, Momentum, AdaGrad, Adam
+
+xs, ys = [x for x, _ in inputs], [y for _, y in inputs]
+
+for optimizer in [Optimizer(learning_rate), Momentum(learning_rate), AdaGrad(5), Adam(0.5)]:
+    epochs = []
+    slope, intercept = fit_linear(xs, ys, optimizer=optimizer,
+                                  max_epochs=20_000, tolerance=1e-6,
+                                  callback=lambda epoch, theta: epochs.append(epoch))
+    print(type(optimizer).__name__, len(epochs), slope, intercept)
+    assert 19.9 < slope < 20.1, "наклон должен быть равен примерно 20"
+    assert 4.9 < intercept < 5.1, "пересечение должно быть равным примерно 5"
+
+# Тот же объект работает и в мини-пакетном цикле
+optimizer = Adam(0.5)
+theta = [random.uniform(-1, 1), random.uniform(-1, 1)]
+
+for epoch in range(200):
+    for batch in mini_batch_views(inputs, batch_size=20):
+        grad = vector_mean([linear_gradient(x, y, theta) for x, y in batch])
+        theta = optimizer.step(theta, grad)
+
+slope, intercept = theta
+assert 19.9 < slope < 20.1, "наклон должен быть равен примерно 20"
+assert 4.9 < intercept < 5.1, "пересечение должно быть равным примерно 5"
@@ -0,0 +1,89 @@
+# Примеры к главе "Гипотеза и вывод"
+# Запуск из корня репозитория: python -m examples.hypothesis_and_conclusion
+import random
+
+from chapters.hypothesis_and_conclusion import (normal_approximation_to_binomial,
+                                                normal_two_sided_bounds,
+                                                normal_probability_between,
+                                                normal_probability_below,
+                                                normal_upper_bound,
+                                                run_experiment,
+                                                reject_fairness)
+
+
+mu_0, sigma_0 = normal_approximation_to_binomial(1000, 0.5)
+
+# Принимаем значимость = 5%
+
+# (469, 531)
+lower_bound, upper_bound = normal_two_sided_bounds(0.95, mu_0, sigma_0)
+
+
+# 95%-ные границы, основанные на допущении, что p = 0.5
+lo, hi = normal_two_sided_bounds(0.95, mu_0, sigma_0)
+
+# Фактические mu и sigma, основанные на p = 0.55
+mu_1, sigma_1 = normal_approximation_to_binomial(1000, 0.55)
+
+# Ошибка 2-го рода означает, что нам не удалось отклонить нулевую гипотезу,
+# что произойдет, когда Х все еще внутри нашего исходного интервала
+type_2_probability = normal_probability_between(lo, hi, mu_1, sigma_1)
+power = 1 - type_2_probability  # ~0.8865
+
+hi = normal_upper_bound(0.95, mu_0, sigma_0)
+# равно 526 (< 531, т. к. нам нужно больше вероятности в верхнем хвосте)
+
+type_2_probability = normal_probability_below(hi, mu_1, sigma_1)
+power = 1 - type_2_probability  # ~0.9364
+
+
+random.seed(0)
+experiments = [run_experiment() for _ in range(1000)]
+
+num_rejections = len([experiment
+                      for experiment in experiments
+                      if reject_fairness(experiment)])
+
+
+assert num_rejections == 46, f'{num_rejections}'
+
+
+# То же без хранения бросков; compatible=True повторяет поток random.seed(0)
+from chapters.hypothesis_and_conclusion import count_rejections
+
+assert count_rejections(1000, 1000, compatible=True) == 46
+
+# Пакетный режим: ~5% отклонений для честной монеты,
+# ~88.65% (мощность) для монеты с p = 0.55
+print(count_rejections(1000, 100_000) / 100_000)
+print(count_rejections(1000, 100_000, p=0.55) / 100_000)
+
+
+# A/B-тест: "tastes great" (200 из 1000) против "less bias" (180 из 1000)
+from chapters.hypothesis_and_conclusion import (a_b_test_statistic, two_sided_p_value,
+                                                a_b_test_batch)
+
+z = a_b_test_statistic(1000, 200, 1000, 180)     # -1.14
+assert abs(two_sided_p_value(z) - 0.254) < 0.001
+
+# Все варианты одним вызовом: контроль (индекс 0) против трех вариантов
+# с поправкой Холма на множественные сравнения
+for result in a_b_test_batch([1000, 1000, 1000, 1000], [200, 180, 150, 240],
+                             control=0, correction='holm'):
+    print(result)
+
+
+# Байесов вывод: бета-плотность считается в логарифмах,
+# поэтому работает и для апостериорных распределений с alpha, beta в тысячах
+from chapters.hypothesis_and_conclusion import beta_pdf, BetaGrid
+
+assert beta_pdf(0.5, 3000, 3000) > 0
+
+# Равномерное априорное Beta(1, 1) и результаты двух вариантов
+grid = BetaGrid()
+prior_alpha, prior_beta = 1, 1
+posterior_a = (prior_alpha + 200, prior_beta + 1000 - 200)
+posterior_b = (prior_alpha + 180, prior_beta + 1000 - 180)
+
+print(grid.credible_intervals([posterior_a, posterior_b]))   # 95%-ные интервалы
+print(grid.prob_greater([(posterior_a, posterior_b)]))        # P(p_B > p_A) ~0.13
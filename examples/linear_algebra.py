@@ -0,0 +1,69 @@
+# Примеры к главе "Линейная алгебра"
+# Запуск из корня репозитория: python -m examples.linear_algebra
+from chapters.linear_algebra import (add, subtract, vector_sum, scalar_multiply,
+                                     vector_mean, dot, sum_of_squares, magnitude,
+                                     shape, identity_matrix)
+
+# Движок numpy возвращает массивы, поэтому векторы сравниваются
+# как списки: так примеры проходят и с DS_BOOK_BACKEND=numpy
+
+assert list(add([1, 2, 3], [4, 5, 6])) == [5, 7, 9]
+assert list(subtract([5, 7, 9], [4, 5, 6])) == [1, 2, 3]
+assert list(vector_sum([[1, 2], [3, 4], [5, 6], [7, 8]])) == [16, 20]
+assert list(scalar_multiply(2, [1, 2, 3])) == [2, 4, 6]
+assert list(vector_mean([[1, 2], [3, 4], [5, 6]])) == [3, 4]
+assert dot([1, 2, 3], [4, 5, 6]) == 32
+assert sum_of_squares([1, 2, 3]) == 14
+assert magnitude([3, 4]) == 5
+
+
+# Matrix
+assert shape([[1, 2, 3], [4, 5, 6]]) == (2, 3)
+
+assert [list(row) for row in identity_matrix(5)] == [[1, 0, 0, 0, 0],
+                                                     [0, 1, 0, 0, 0],
+                                                     [0, 0, 1, 0, 0],
+                                                     [0, 0, 0, 1, 0],
+                                                     [0, 0, 0, 0, 1]]
+
+
+# Тот же API на движке numpy: результаты должны совпадать с чистым Python
+import math
+import random
+
+from chapters import linear_algebra
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+if numpy is not None:
+    random.seed(0)
+    vs = [[random.uniform(-10, 10) for _ in range(5)] for _ in range(100)]
+
+    def results():
+        return [linear_algebra.vector_sum(vs), linear_algebra.vector_mean(vs),
+                linear_algebra.add(vs[0], vs[1]), linear_algebra.subtract(vs[0], vs[1]),
+                linear_algebra.scalar_multiply(3, vs[2]), [linear_algebra.dot(vs[0], vs[1])],
+                [linear_algebra.magnitude(vs[3])], [linear_algebra.distance(vs[4], vs[5])],
+                linear_algebra.get_col(vs, 2)]
+
+    initial_backend = linear_algebra.get_backend()
+    linear_algebra.set_backend('python')
+    python_results = results()
+    linear_algebra.set_backend('numpy')
+    numpy_results = results()
+    linear_algebra.set_backend(initial_backend)
+
+    for expected, actual in zip(python_results, numpy_results):
+        assert all(math.isclose(e, a, rel_tol=1e-9, abs_tol=1e-9)
+                   for e, a in zip(expected, actual))
+
+    # Переключаются и функции, импортированные под другим именем
+    from chapters.linear_algebra import add as vector_add
+    linear_algebra.set_backend('numpy')
+    assert isinstance(vector_add(vs[0], vs[1]), numpy.ndarray)
+    linear_algebra.set_backend('python')
+    assert isinstance(vector_add(vs[0], vs[1]), list)
+    linear_algebra.set_backend(initial_backend)
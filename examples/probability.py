@@ -0,0 +1,63 @@
+# Примеры к главе "Вероятность"
+# Запуск из корня репозитория: python -m examples.probability
+import random
+
+from chapters.probability import Kid, random_kid
+
+
+# Парадокс мальчика и девочки
+both_girls = 0
+older_girl = 0
+either_girl = 0
+
+random.seed(0)
+
+for _ in range(1000):
+    younger = random_kid()
+    older = random_kid()
+    if older == Kid.GIRL:
+        older_girl += 1
+    if older == Kid.GIRL and younger == Kid.GIRL:
+        both_girls += 1
+    if older == Kid.GIRL or younger == Kid.GIRL:
+        either_girl += 1
+
+print("P(both | older): ", both_girls / older_girl)  # ~0.49
+print("P(both | either): ", both_girls / either_girl)  # ~0.32
+
+
+# То же самое пакетами: 10 миллионов семей за доли секунды,
+# результат воспроизводим при любом числе процессов
+from chapters.probability import simulate, kid_trials
+
+counts = simulate(kid_trials, 10_000_000, seed=0)
+assert counts == simulate(kid_trials, 10_000_000, seed=0, processes=2)
+
+print("P(both | older): ", counts['both_girls'] / counts['older_girl'])  # ~0.5
+print("P(both | either): ", counts['both_girls'] / counts['either_girl'])  # ~0.33
+
+
+# Нормальное распределение для целых массивов: на движке numpy - векторно,
+# с теми же значениями, что и поэлементные функции
+import math
+
+from chapters import linear_algebra
+from chapters.probability import (normal_pdf, normal_cdf, inverse_normal_cdf,
+                                  normal_pdfs, normal_cdfs, inverse_normal_cdfs)
+
+xs = [x / 10 for x in range(-100, 101)]
+ps = [0.0, 1e-300, 0.001, 0.02425, 0.3, 0.5, 0.9, 0.99999, 1.0]
+expected = ([normal_pdf(x, 1, 2) for x in xs], [normal_cdf(x, 1, 2) for x in xs],
+            [inverse_normal_cdf(p, 1, 2) for p in ps])
+
+initial_backend = linear_algebra.get_backend()
+for backend in ['python', 'numpy']:
+    try:
+        linear_algebra.set_backend(backend)
+    except ImportError:
+        continue
+    actual = normal_pdfs(xs, 1, 2), normal_cdfs(xs, 1, 2), inverse_normal_cdfs(ps, 1, 2)
+    for want, got in zip(expected, actual):
+        assert all(w == g or math.isclose(w, g, rel_tol=1e-9, abs_tol=1e-15)
+                   for w, g in zip(want, got)), backend
+linear_algebra.set_backend(initial_backend)
@@ -0,0 +1,56 @@
+# Примеры к модулю временных рядов цен (chapters/time_series.py)
+# Запуск из корня репозитория: python -m examples.time_series
+import datetime
+import math
+import random
+
+from chapters.statistics import standard_deviation
+from chapters.time_series import (pct_changes, log_returns, rolling_mean, rolling_std,
+                                  rolling_min, rolling_max, top_movers,
+                                  per_symbol, table_top_movers)
+from chapters.work_with_data import StockPrice, PriceTable
+
+
+# Случайное блуждание цен трех акций
+random.seed(0)
+data = []
+for symbol in ["AAPL", "MSFT", "FB"]:
+    price = 100.0
+    for day in range(250):
+        price *= math.exp(random.gauss(0, 0.02))
+        data.append(StockPrice(symbol, datetime.date(2019, 1, 1) + datetime.timedelta(day), price))
+
+table = PriceTable.from_prices(data)
+aapl = [sp.closing_price for sp in data if sp.symbol == "AAPL"]
+
+
+# Доходности
+changes = pct_changes(aapl)
+assert len(changes) == len(aapl) - 1
+assert all(abs(math.log(1 + c) - r) < 1e-12 for c, r in zip(changes, log_returns(aapl)))
+
+
+# Скользящие статистики за O(n) совпадают с пересчетом каждого окна
+window = 20
+windows = [aapl[i:i + window] for i in range(len(aapl) - window + 1)]
+
+assert all(abs(m - sum(w) / window) < 1e-9 for m, w in zip(rolling_mean(aapl, window), windows))
+assert all(abs(s - standard_deviation(w)) < 1e-9 for s, w in zip(rolling_std(aapl, window), windows))
+assert rolling_max(aapl, window) == [max(w) for w in windows]
+assert rolling_min(aapl, window) == [min(w) for w in windows]
+
+
+# По всем акциям сразу; processes > 1 - по пулу процессов
+monthly_highs = per_symbol(table, rolling_max, 21)
+assert monthly_highs["AAPL"] == rolling_max(aapl, 21)
+
+if __name__ == "__main__":
+    assert per_symbol(table, rolling_max, 21, processes=2) == monthly_highs
+
+
+# Крупнейшие движения: куча вместо полной сортировки
+best, worst = table_top_movers(table, k=5)
+by_change = sorted(table.all_changes(), key=lambda change: change.pct_change)
+assert best == by_change[::-1][:5]
+assert worst == by_change[:5]
+assert top_movers(table.all_changes(), k=5) == (best, worst)
@@ -1,3 +1,5 @@
+# Примеры к главе "Визуализация данных"
+# Запуск из корня репозитория: python -m examples.visualisation
 import matplotlib.pyplot as plt
 
 
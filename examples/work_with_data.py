@@ -0,0 +1,249 @@
+# Примеры к главе "Работа с данными"
+# Запуск из корня репозитория: python -m examples.work_with_data
+import random
+import datetime
+from typing import List, Dict
+from collections import defaultdict, namedtuple
+
+import tqdm
+
+from chapters.linear_algebra import distance
+from chapters.work_with_data import (StockPrice, StockPrice2, DailyChange,
+                                     parse_row, try_parse_row,
+                                     day_over_day_changes,
+                                     scale, rescale, primes_up_to)
+
+
+# Гистограммы (графики - в work_with_data.ipynb)
+import os
+import tempfile
+
+from chapters.work_with_data import make_histogram, Histogram, histogram_of_chunks
+
+random.seed(0)
+normal = [random.gauss(0, 57) for _ in range(10000)]
+histogram = make_histogram(normal, 10)
+
+# Та же гистограмма по частям (в пуле процессов) - и только сводка вместо точек
+chunks = [normal[i:i + 1000] for i in range(0, len(normal), 1000)]
+if __name__ == "__main__":
+    assert histogram_of_chunks(chunks, bucket_size=10, processes=2).as_dict() == histogram
+
+summary_path = os.path.join(tempfile.mkdtemp(), 'histogram.json')
+histogram_of_chunks(chunks, bucket_size=10).save(summary_path)
+assert Histogram.load(summary_path).as_dict() == histogram
+
+# Интервалы по квантилям: в каждом примерно одинаковое число точек
+by_quantiles = Histogram.from_quantiles(normal, 10).update(normal)
+assert all(count == 1000 for _, _, count in by_quantiles.bars())
+
+
+# Применение типизированных именованных кортежей
+# проблемный вариант, связанный с лишней занимаемой памятью и вероятностью присвоить лишнее (несуществующее) значение
+stock_price = {'closing_price': 102.06,
+               'date': datetime.date(2014, 8, 29),
+               'symbol': 'AAPL'}
+
+
+# Альтернатива - именованный кортеж
+StockPriceTuple = namedtuple('StockPrice', ['symbol', 'date', 'closing_price'])
+price = StockPriceTuple('MSFT', datetime.date(2018, 12, 14), 106.03)
+
+assert price.symbol == 'MSFT'
+assert price.closing_price == 106.03
+
+
+price = StockPrice('MSFT', datetime.date(2018, 12, 14), 106.03)
+
+assert price.symbol == 'MSFT'
+assert price.closing_price == 106.03
+assert price.is_high_tech()
+
+
+price2 = StockPrice2('MSFT', datetime.date(2018, 12, 14), 106.03)
+
+assert price2.symbol == 'MSFT'
+assert price2.closing_price == 106.03
+assert price2.is_high_tech()
+
+
+# Очистка и конвертирование
+# Тестируем функцию
+stock = parse_row(["MSFT", "2018-12-14", "106.03"])
+
+
+assert stock.symbol == 'MSFT'
+assert stock.closing_price == 106.03
+assert stock.date == datetime.date(2018, 12, 14)
+
+
+# Должно вернуть None в случае ошибок
+assert try_parse_row(["MSFT0", "2018-12-14", "106.03"]) is None
+assert try_parse_row(["MSFT", "2018-12--14", "106.03"]) is None
+assert try_parse_row(["MSFT", "2018-12-14", "x"]) is None
+
+# Но должно вернуть то же, что и раньше, если данные хорошие
+assert try_parse_row(["MSFT", "2018-12-14", "106.03"]) == stock
+
+
+# Массовая загрузка файла: столбцы цен и число плохих строк
+from chapters.work_with_data import load_stock_prices
+
+prices_path = os.path.join(tempfile.mkdtemp(), 'prices.csv')
+with open(prices_path, 'w') as f:
+    f.write("MSFT,2018-12-14,106.03\n"
+            "MSFT0,2018-12-14,106.03\n"
+            "AAPL,2018-12-14,165.48\n"
+            "MSFT,2018-12--14,106.03\n")
+
+quarantine = []
+columns, num_bad = load_stock_prices(prices_path, quarantine=quarantine)
+assert num_bad == 2 and [line for line, _ in quarantine] == [2, 4]
+assert list(columns)[0] == stock
+
+
+data = [
+    StockPrice(symbol='MSFT',
+               date=datetime.date(2018, 12, 24),
+               closing_price=106.03),
+]
+
+# Еще три акции вперемешку, с повторяющимися датами: на таких данных
+# сравнение с PriceTable ниже действительно что-то проверяет
+random.seed(0)
+data += [StockPrice(symbol=random.choice(["AAPL", "MSFT", "FB"]),
+                    date=datetime.date(2018, random.randint(1, 12), random.randint(1, 28)),
+                    closing_price=round(random.uniform(50, 200), 2))
+         for _ in range(1000)]
+
+# Максимальная цена акции AAPL
+max_aapl_price = max([stock_price.closing_price
+                     for stock_price in data
+                     if stock_price.symbol == "AAPL"], default=0)
+
+# Максимальная цена всех акций
+max_prices: Dict[str, float] = defaultdict(lambda : float('-inf'))
+
+for sp in data:
+    symbol, closing_price = sp.symbol, sp.closing_price
+    if closing_price > max_prices[symbol]:
+        max_prices[symbol] = closing_price
+
+
+# Максимальное/Минимальное однодневное процентное изменение
+# Собрать цены по символу
+prices: Dict[str, List[StockPrice]] = defaultdict(list)
+
+for sp in data:
+    prices[sp.symbol].append(sp)
+
+# Упорядочить по дате
+prices = {symbol: sorted(symbol_prices)
+          for symbol, symbol_prices in prices.items()}
+
+
+# И собираем их все
+all_changes = [change
+               for symbol_prices in prices.values()
+               for change in day_over_day_changes(symbol_prices)]
+
+max_change = max(all_changes, key=lambda change: change.pct_change, default=0)
+min_change = min(all_changes, key=lambda change: change.pct_change, default=0)
+
+
+# среднедневное изменение по месяцу
+changes_by_month: Dict[int, List[DailyChange]] = {month: [] for month in range(1, 13)}
+
+for change in all_changes:
+    changes_by_month[change.date.month].append(change)
+
+# avg_daily_change = {
+#     month: sum(change.pct_change for change in changes) / len(changes)
+#     for month, changes in changes_by_month.items()
+# }
+
+
+# То же по столбцам: без словарей списков и кортежа на каждую цену
+from chapters.work_with_data import PriceTable
+
+assert data != sorted(data) and len({(sp.symbol, sp.date) for sp in data}) < len(data)
+assert len(all_changes) == len(data) - 3 and all(changes_by_month.values())
+
+table = PriceTable.from_prices(data)
+assert table.max_prices() == max_prices
+assert table.all_changes() == all_changes
+assert table.changes_by_month() == changes_by_month
+
+
+# Шкалирование
+a_to_b = distance([63, 150], [67, 160])        # 10.77
+a_to_c = distance([63, 150], [70, 171])        # 22.14
+b_to_c = distance([67, 160], [70, 171])        # 11.40
+
+a_to_b = distance([160, 150], [170.2, 160])    # 14.28
+a_to_c = distance([160, 150], [177.8, 171])    # 27.53
+b_to_c = distance([170.2, 160], [177.8, 171])  # 13.37
+
+vectors = [[-3, -1, 1], [-1, 0, 1], [1, 1, 1]]
+means, stdevs = scale(vectors)
+assert means == [-1, 0, 1]
+assert stdevs == [2, 1, 0]
+
+means, stdevs = scale(rescale(vectors))
+assert means == [0, 0, 1]
+assert stdevs == [1, 1, 0]
+
+# Подогнанный один раз шкалировщик можно сохранить и применять к новым данным
+from chapters.work_with_data import Scaler
+
+scaler = Scaler().fit(vectors)
+path = os.path.join(tempfile.mkdtemp(), 'scaler.json')
+scaler.save(path)
+
+serving_scaler = Scaler.load(path)
+assert serving_scaler.transform([[1, 1, 1]]) == [[1, 1, 1]]
+assert serving_scaler.inverse_transform(serving_scaler.transform(vectors)) == vectors
+
+
+# Снижение размерности
+from chapters.linear_algebra import distance as vector_distance
+from chapters.work_with_data import se_mean, first_principal_component, PCA
+
+random.seed(0)
+pca_data = []
+for _ in range(1000):
+    t = random.gauss(0, 3)
+    pca_data.append([t + random.gauss(0, 0.1), 2 * t + random.gauss(0, 0.1), -t + 5])
+
+# Градиентный подъем (как в книге) и разложение ковариационной матрицы
+# находят одну и ту же главную компоненту
+component = first_principal_component(se_mean(pca_data), n=100, step_size=0.001)
+pca = PCA(num_components=2).fit(pca_data)
+assert vector_distance(component, pca.components[0]) < 0.001
+
+# Подгонка по частям дает тот же результат
+chunked = PCA(num_components=2)
+for start in range(0, len(pca_data), 100):
+    chunked.partial_fit(pca_data[start:start + 100])
+assert vector_distance(chunked.components[0], pca.components[0]) < 1e-9
+
+# Две компоненты почти без потерь восстанавливают трехмерные точки
+restored = pca.inverse_transform(pca.transform(pca_data[:10]))
+assert all(vector_distance(v, w) < 0.5 for v, w in zip(restored, pca_data[:10]))
+
+
+# библиотека tqdm
+for i in tqdm.tqdm(range(100)):
+    # Делать что-то медленное
+    _ = [random.random() for _ in range(1000000)]
+
+
+my_primes = primes_up_to(100_000)
+assert my_primes[:5] == [2, 3, 5, 7, 11] and len(my_primes) == 9592
+
+# Отрезками (память ограничена размером отрезка) и в пуле процессов
+from chapters.work_with_data import iter_primes
+
+if __name__ == "__main__":
+    assert primes_up_to(100_000, segment_size=10_000, processes=2, progress=False) == my_primes
+num_primes = sum(1 for _ in iter_primes(10_000_000, progress=True))